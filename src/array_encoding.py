@@ -0,0 +1,118 @@
+"""Compact encoding of numeric arrays in submission data.
+
+NumPy arrays put in the submission data are serialized as JSON lists of float64 text. The functions
+in this module encode them as base64 typed-array blobs instead, in the format Plotly uses for its
+figure data:
+
+    {"dtype": "f4", "bdata": "AACAPwAAAEA=", "shape": "2, 3"}
+
+Plotly.js decodes these blobs natively, hence encoded arrays can be used as figure data directly.
+Arrays read back from the submission data are decoded with `decode_array`, which also accepts
+plain lists.
+"""
+
+import base64
+
+import numpy as np
+
+# Compact dtypes per kind of NumPy dtype, used when no dtype is given. Only dtypes supported by
+# Plotly.js typed arrays are used.
+COMPACT_DTYPES = {"b": "u1", "f": "f4", "i": "i4", "u": "u4"}
+
+
+def encode_array(values, dtype: str | None = None) -> dict:
+    """Encode a numeric array as base64 typed-array blob.
+
+    Args:
+        values:     Array-like with numeric values.
+        dtype:      Dtype of the encoded values, e.g. "f4" or "i2". Defaults to the compact dtype of
+            the kind of the values (float32 for floats).
+
+    Returns:
+        encoded:    Dict with the dtype, base64 data and, for multi-dimensional arrays, the shape.
+
+    Raises:
+        ValueError: When the values are not numeric.
+    """
+    values = np.asarray(values)
+
+    if dtype is None:
+        if values.dtype.kind not in COMPACT_DTYPES:
+            raise ValueError(f"Cannot encode array with non-numeric dtype '{values.dtype}'.")
+
+        dtype = COMPACT_DTYPES[values.dtype.kind]
+
+    # Typed arrays in the browser are little-endian.
+    values = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder("<"))
+    encoded = {"dtype": dtype, "bdata": base64.b64encode(values.tobytes()).decode("ascii")}
+
+    if values.ndim > 1:
+        encoded["shape"] = ", ".join(str(size) for size in values.shape)
+
+    return encoded
+
+
+def decode_array(encoded) -> np.ndarray:
+    """Decode an array encoded with `encode_array`.
+
+    Args:
+        encoded:    Encoded array, or a (nested) list of values as stored by older versions.
+
+    Returns:
+        values:     The decoded array.
+    """
+    if not is_encoded(encoded):
+        return np.asarray(encoded)
+
+    values = np.frombuffer(
+        base64.b64decode(encoded["bdata"]), dtype=np.dtype(encoded["dtype"]).newbyteorder("<")
+    )
+
+    if "shape" in encoded:
+        shape = encoded["shape"]
+        if isinstance(shape, str):
+            shape = [int(size) for size in shape.split(",")]
+
+        values = values.reshape(shape)
+
+    return values
+
+
+def encode_arrays(arrays: dict, dtype: str | None = None) -> dict:
+    """Encode the numeric arrays in a dict, e.g. the columns of a table.
+
+    Args:
+        arrays:     Dict with array-likes. Non-numeric arrays (like dates) are stored as lists.
+        dtype:      Dtype of the encoded values. See `encode_array`.
+
+    Returns:
+        encoded:    Dict with the encoded arrays.
+    """
+    encoded = {}
+
+    for name, values in arrays.items():
+        values = np.asarray(values)
+
+        if values.dtype.kind in COMPACT_DTYPES:
+            encoded[name] = encode_array(values, dtype)
+        else:
+            encoded[name] = values.tolist()
+
+    return encoded
+
+
+def decode_arrays(encoded: dict) -> dict:
+    """Decode a dict with arrays encoded with `encode_arrays`.
+
+    Args:
+        encoded:    Dict with encoded arrays.
+
+    Returns:
+        arrays:     Dict with the decoded arrays.
+    """
+    return {name: decode_array(values) for name, values in encoded.items()}
+
+
+def is_encoded(data) -> bool:
+    """Whether the data is an array encoded with `encode_array`."""
+    return isinstance(data, dict) and "bdata" in data and "dtype" in data
@@ -25,6 +25,8 @@ from birdswarm.pso_method import PSO
 from scipy.interpolate import RegularGridInterpolator
 from simian.gui import Form, component, utils
 
+from array_encoding import decode_arrays, encode_arrays
+
 
 def gui_init(meta_data: dict) -> dict:
     # Create the form and load the json builder into it.
@@ -110,16 +112,36 @@ def initiate_landscape(meta_data: dict, payload: dict) -> dict:
     image_format = mimetypes.guess_type("terrain.png")[0]
     terrain_fig_payload = f"data:{image_format};base64,{terrain_fig_base64_data}"
 
-    payload, _ = utils.setSubmissionData(payload, "terrain_elevation_map", elevation_map)
+    # The grids are not stored, as they can be reconstructed from the coordinates.
+    payload, _ = utils.setSubmissionData(
+        payload, "terrain_elevation_map", encode_arrays({"X": X, "Y": Y, "zg": zg})
+    )
     payload, _ = utils.setSubmissionData(payload, "image", terrain_fig_payload)
 
     return payload
 
 
+def get_elevation_map(payload: dict) -> dict:
+    # Decode the elevation map in the submission data and reconstruct its grids.
+    elevation_map, _ = utils.getSubmissionData(payload, key="terrain_elevation_map")
+
+    if not elevation_map:
+        return {}
+
+    elevation_map = decode_arrays(elevation_map)
+
+    if "xg" not in elevation_map:
+        elevation_map["xg"], elevation_map["yg"] = np.meshgrid(
+            elevation_map["X"], elevation_map["Y"]
+        )
+
+    return elevation_map
+
+
 def calc_update(meta_data: dict, payload: dict) -> dict:
     # Calculate and animate swarm behavior, based on user preferences.
     start_time = time.time()
-    elevation_map, _ = utils.getSubmissionData(payload, key="terrain_elevation_map")
+    elevation_map = get_elevation_map(payload)
 
     if not elevation_map:
         # No elevation map available yet, stop and return.
@@ -52,7 +52,7 @@ def plot_3d_pso_base(elev_map, ax=None):
     len_space = 1
 
     # Customize the axis.
-    max_z = (np.max(zg) // len_space + 1).astype(np.integer) * len_space
+    max_z = (np.max(zg) // len_space + 1).astype(int) * len_space
     ax.set_xlim3d(np.min(xg), np.max(xg))
     ax.set_ylim3d(np.min(yg), np.max(yg))
     ax.set_zlim3d(0, max_z)
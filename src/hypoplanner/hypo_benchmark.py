@@ -0,0 +1,204 @@
+"""Benchmark of the hypotheek planner calculations.
+
+Measures the latency of a full recalculation (all calculation stages, no cache, optionally
+including the risk simulation) for a range of loan terms, with the hypotheek verloop table and its
+report table constructed with the previous row-wise and the current column-wise implementation.
+The construction of both tables is also timed on its own.
+
+Run from the `src` folder with:
+
+    python -m hypoplanner.hypo_benchmark
+"""
+
+import argparse
+import copy
+import datetime
+import hashlib
+import time
+
+import numpy as np
+import pandas as pd
+
+from hypoplanner import hypo_planner
+
+# Default values of the form inputs.
+DEFAULT_INPUTS = {
+    "koopsom": 400000,
+    "woz_waarde": 375000,
+    "kosten_advies": 3000,
+    "kosten_hypotheekakte": 1500,
+    "kosten_keuring": 1000,
+    "eigen_middelen": 20000,
+    "looptijd_jaren": 30,
+    "looptijd_fiscaal_aftrekbaar": 30,
+    "periode_selector": 1,
+    "toggle_nhg": True,
+    "toggle_inflatie_woz": False,
+    "perc_hypotheekrente": 3.5,
+    "perc_aflosvorm_annuitair": 100,
+    "perc_aflosvrij": 10,
+    "perc_overdrachtsbelasting": 2,
+    "perc_forfait": 0.35,
+    "perc_voorlopigeteruggaaf": 36.97,
+    "perc_tarief_nhg": 0.6,
+    "perc_inflatie_woz": 1,
+    "toggle_simulatie": False,
+    "rentevast_jaren": 10,
+    "sigma_rente": 0.75,
+    "sigma_inflatie_woz": 2,
+    "simulatie_paden": 2000,
+    "hold_netto_maandlast": (),
+}
+
+LOOPTIJDEN = [5, 10, 15, 20, 25, 30]
+
+
+def _table_rowwise(perioden_n, perioden_s, verloop: dict, fiscaal: dict) -> pd.DataFrame:
+    """Previous implementation: construct the table from a list of row tuples."""
+    aflossing = verloop["aflossing_annuitair"] + verloop["aflossing_lineair"]
+    bruto = verloop["rente"] + aflossing
+    netto = bruto + fiscaal["fiscaal_ew"] - fiscaal["fiscaal_vt"]
+
+    return pd.DataFrame(
+        list(
+            zip(
+                perioden_n,
+                perioden_s,
+                verloop["saldo"],
+                fiscaal["woz_waarde_array"],
+                verloop["rente"],
+                aflossing,
+                fiscaal["fiscaal_vt"],
+                fiscaal["fiscaal_ew"],
+                bruto,
+                netto,
+            )
+        ),
+        columns=["id", "datum", "saldo", "woz", "rente", "aflossing", "vt", "ew", "bruto", "netto"],
+    )
+
+
+def _report_rowwise(results_table: pd.DataFrame, format_col_names: list) -> pd.DataFrame:
+    """Previous implementation: deep copy and per-element formatting of each column."""
+    report_table = copy.deepcopy(results_table)
+
+    for name in format_col_names:
+        report_table[name] = np.round(results_table[name]).apply(lambda x: "€ {:.2f}".format(x))
+
+    return report_table
+
+
+def _time(fcn, *args, repeat: int) -> float:
+    """Mean execution time of the function in milliseconds."""
+    start = time.perf_counter()
+
+    for _ in range(repeat):
+        fcn(*args)
+
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def recalculate(inputs: dict, rowwise: bool = False) -> dict:
+    """Run all calculation stages of the planner, without caching.
+
+    Args:
+        inputs:     Form inputs, as collected by calc_update.
+        rowwise:    Whether to construct the tables with the previous row-wise implementation.
+            Defaults to False.
+
+    Returns:
+        report:     The formatted report table and the hash of the hypotheek verloop.
+    """
+    hypotheek = hypo_planner.calc_hypotheek(inputs)
+    verloop = hypo_planner.calc_verloop(inputs, hypotheek)
+    fiscaal = hypo_planner.calc_fiscaal(inputs, verloop)
+
+    if rowwise:
+        perioden_n = verloop["perioden_n"]
+        perioden_s = hypo_planner.get_calendar(inputs["today"])["perioden_s"][: len(perioden_n)]
+        table = _table_rowwise(perioden_n, perioden_s, verloop, fiscaal)
+    else:
+        table = hypo_planner.calc_tabel(inputs, verloop, fiscaal)
+
+    simulatie = hypo_planner.calc_simulatie(inputs)
+    hypo_planner.calc_grafieken(inputs, table, simulatie)
+    hypo_planner.calc_vergelijk(inputs, table)
+    hypo_planner.calc_verdeling(inputs, hypotheek, verloop, table)
+
+    if rowwise:
+        schedule_hash = hashlib.sha1(
+            pd.util.hash_pandas_object(table, index=False).to_numpy().tobytes()
+        ).hexdigest()
+        return {
+            "tabel": _report_rowwise(table, hypo_planner.REPORT_EURO_COLUMNS),
+            "hash": schedule_hash,
+        }
+
+    return hypo_planner.calc_rapport(inputs, table)
+
+
+def run(looptijden: list[int], repeat: int, simulatie: bool = False) -> None:
+    """Run the benchmark for all loan terms and print the results."""
+    print(
+        f"{'looptijd':>8}{'event rowwise [ms]':>20}{'event columnar [ms]':>21}"
+        f"{'tabel rowwise [ms]':>20}{'tabel columnar [ms]':>21}"
+        f"{'rapport rowwise [ms]':>22}{'rapport columnar [ms]':>23}"
+    )
+
+    # Warm up, such that the first measurement does not include the lazy imports.
+    recalculate({**DEFAULT_INPUTS, "today": datetime.date.today()})
+
+    for looptijd_jaren in looptijden:
+        inputs = {**DEFAULT_INPUTS, "looptijd_jaren": looptijd_jaren, "toggle_simulatie": simulatie}
+        inputs["today"] = datetime.date.today()
+
+        hypotheek = hypo_planner.calc_hypotheek(inputs)
+        verloop = hypo_planner.calc_verloop(inputs, hypotheek)
+        fiscaal = hypo_planner.calc_fiscaal(inputs, verloop)
+        perioden_n = verloop["perioden_n"]
+        perioden_s = hypo_planner.get_calendar(inputs["today"])["perioden_s"][: len(perioden_n)]
+        table = hypo_planner.calc_tabel(inputs, verloop, fiscaal)
+        columns = hypo_planner.REPORT_EURO_COLUMNS
+
+        print(
+            f"{looptijd_jaren:>8}"
+            f"{_time(recalculate, inputs, True, repeat=repeat):>20.2f}"
+            f"{_time(recalculate, inputs, repeat=repeat):>21.2f}"
+            f"{_time(_table_rowwise, perioden_n, perioden_s, verloop, fiscaal, repeat=repeat):>20.3f}"
+            f"{_time(hypo_planner.calc_tabel, inputs, verloop, fiscaal, repeat=repeat):>21.3f}"
+            f"{_time(_report_rowwise, table, columns, repeat=repeat):>22.3f}"
+            f"{_time(hypo_planner.prep_report_table, table, columns, repeat=repeat):>23.3f}"
+        )
+
+
+if __name__ == "__main__":
+    args_parser = argparse.ArgumentParser(description="Hypotheek planner benchmark.")
+
+    args_parser.add_argument(
+        "-l",
+        "--looptijden",
+        type=int,
+        nargs="+",
+        default=LOOPTIJDEN,
+        help="loan terms in years",
+    )
+
+    args_parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=20,
+        help="number of repetitions per measurement",
+    )
+
+    args_parser.add_argument(
+        "-s",
+        "--simulatie",
+        action="store_true",
+        default=False,
+        help="include the Monte Carlo risk simulation",
+    )
+
+    args = args_parser.parse_args()
+
+    run(args.looptijden, args.repeat, args.simulatie)
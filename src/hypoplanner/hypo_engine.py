@@ -0,0 +1,578 @@
+"""Hypotheek engine module.
+
+Vectorized mortgage calculations of the hypotheek planner. All functions accept scalars or 1-D
+arrays of scenario parameters, which are broadcast against each other. Monthly results are
+returned as (scenarios, months) arrays, such that thousands of scenarios can be calculated in one
+pass. Months after the end of the term of a scenario are zero.
+
+Copyright 2020-2024 MonkeyProof Solutions BV.
+"""
+
+import concurrent.futures
+import datetime
+import functools
+
+import numpy as np
+
+# Uitwerking afbouw Wet Hillen [2024 - 2048].
+HILLEN_INIT_YEAR = 2024
+HILLEN_END_YEAR = 2048
+AFTREK_HILLEN_INIT_YEAR = 80
+AFTREK_HILLEN_END_YEAR = 0
+
+# Monte Carlo simulatie: mean reversion van de hypotheekrente per jaar, percentielen van de
+# resultaten, aantal paden per deelberekening en het aantal paden vanaf waar de deelberekeningen
+# over meerdere processen worden verdeeld.
+RATE_MEAN_REVERSION = 0.2
+PERCENTILES = (5, 25, 50, 75, 95)
+CHUNK_PATHS = 2000
+PARALLEL_MIN_PATHS = 20000
+
+
+def scenario_grid(**params) -> dict:
+    """Create the scenario parameters for all combinations of the given parameter values.
+
+    Example:
+        scenario_grid(perc_hypotheekrente=[3, 4, 5], looptijd_jaren=[20, 30]) results in six
+        scenarios.
+
+    Args:
+        params:     Parameter names with a scalar or a list of values.
+
+    Returns:
+        scenarios:  Parameter names with flattened arrays of the parameter values per scenario.
+    """
+    grids = np.meshgrid(*[np.atleast_1d(value) for value in params.values()], indexing="ij")
+
+    return {name: grid.ravel() for name, grid in zip(params.keys(), grids)}
+
+
+def calc_loan(
+    koopsom,
+    kosten_advies,
+    kosten_hypotheekakte,
+    kosten_keuring,
+    eigen_middelen,
+    toggle_nhg,
+    perc_aflosvrij,
+    perc_overdrachtsbelasting,
+    perc_tarief_nhg,
+) -> dict:
+    """Calculate the required loan.
+
+    Args:
+        koopsom:                    Purchase price [EUR].
+        kosten_advies:              Advisory costs [EUR].
+        kosten_hypotheekakte:       Notary costs [EUR].
+        kosten_keuring:             Inspection costs [EUR].
+        eigen_middelen:             Own funds [EUR].
+        toggle_nhg:                 Whether the loan is guaranteed by the NHG.
+        perc_aflosvrij:             Interest-only part of the loan [%].
+        perc_overdrachtsbelasting:  Transfer tax [%].
+        perc_tarief_nhg:            NHG fee [%].
+
+    Returns:
+        loan:       Transfer tax, NHG costs, required loan and its repaying and interest-only
+            parts, per scenario.
+    """
+    # Bepaal overdrachtsbelasting en daarna kosten koper.
+    overdrachtsbelasting = np.asarray(perc_overdrachtsbelasting) / 100 * koopsom
+    kosten_koper = kosten_advies + kosten_hypotheekakte + kosten_keuring + overdrachtsbelasting
+
+    # Bepaal hoogte financiering en kosten NHG.
+    hypotheek_ex_nhg = koopsom + kosten_koper - eigen_middelen
+    tarief_nhg = np.where(toggle_nhg, perc_tarief_nhg, 0) / 100
+    hypo_benodigd = hypotheek_ex_nhg / (1 - tarief_nhg)
+    kosten_nhg = tarief_nhg * hypo_benodigd
+
+    hypo_aflossend = (1 - np.asarray(perc_aflosvrij) / 100) * hypo_benodigd
+    hypo_niet_aflossend = hypo_benodigd - hypo_aflossend
+
+    return {
+        "overdrachtsbelasting": overdrachtsbelasting,
+        "kosten_nhg": kosten_nhg,
+        "hypo_benodigd": hypo_benodigd,
+        "hypo_aflossend": hypo_aflossend,
+        "hypo_niet_aflossend": hypo_niet_aflossend,
+    }
+
+
+def calc_amortization(
+    hypo_aflossend, hypo_niet_aflossend, looptijd_jaren, perc_hypotheekrente, perc_aflosvorm_annuitair
+) -> dict:
+    """Calculate the monthly balances, interest and repayments.
+
+    The repaying part of the loan is a mix of an annuity and a linear loan.
+
+    Args:
+        hypo_aflossend:             Repaying part of the loan [EUR].
+        hypo_niet_aflossend:        Interest-only part of the loan [EUR].
+        looptijd_jaren:             Term of the loan [years].
+        perc_hypotheekrente:        Yearly interest rate [%].
+        perc_aflosvorm_annuitair:   Annuity part of the repaying part of the loan [%].
+
+    Returns:
+        amortization:   Monthly interest rate per scenario, month numbers, a mask of the months
+            within the term and the (scenarios, months) balances, interest and repayments.
+    """
+    hypo_aflossend, hypo_niet_aflossend, looptijd_jaren, perc_hypotheekrente, perc_ann = [
+        param[:, np.newaxis]
+        for param in np.broadcast_arrays(
+            *np.atleast_1d(
+                hypo_aflossend,
+                hypo_niet_aflossend,
+                looptijd_jaren,
+                perc_hypotheekrente,
+                perc_aflosvorm_annuitair,
+            )
+        )
+    ]
+
+    # Bepaal hypotheekrente op maandbasis.
+    # im : interest per month.
+    looptijd_maanden = 12 * looptijd_jaren.astype(int)
+    perioden_n = np.arange(0, looptijd_maanden.max(initial=0), 1)
+    in_looptijd = perioden_n < looptijd_maanden
+    im = perc_hypotheekrente / 100 / 12
+
+    # Mix lineair en annuitair.
+    hypo_aflossend_ann = perc_ann / 100 * hypo_aflossend
+    hypo_aflossend_lin = hypo_aflossend - hypo_aflossend_ann
+
+    # Annuitair: mensualiteit (mst), saldo en aflossing. Zonder rente lost de annuiteit lineair af.
+    groei = (1 + im) ** perioden_n
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mst = np.where(
+            im > 0,
+            hypo_aflossend_ann * im / (1 - (1 + im) ** -looptijd_maanden),
+            hypo_aflossend_ann / looptijd_maanden,
+        )
+        hypo_saldo_aflossend_ann = np.where(
+            im > 0,
+            groei * hypo_aflossend_ann + mst / im * (1 - groei),
+            hypo_aflossend_ann - mst * perioden_n,
+        )
+
+    aflossing_annuitair = mst - (im * hypo_saldo_aflossend_ann)
+
+    # Lineair: aflossing en saldo.
+    aflos_lin_maand = hypo_aflossend_lin / looptijd_maanden
+    hypo_saldo_aflossend_lin = hypo_aflossend_lin - (aflos_lin_maand * perioden_n)
+    aflossing_lineair = np.broadcast_to(aflos_lin_maand, in_looptijd.shape)
+
+    # Totaal aflossend saldo, totaal saldo en rente. Alles na het einde van de looptijd is nul.
+    hypo_saldo_aflossend_ann = np.where(in_looptijd, hypo_saldo_aflossend_ann, 0)
+    hypo_saldo_aflossend_lin = np.where(in_looptijd, hypo_saldo_aflossend_lin, 0)
+    aflossing_annuitair = np.where(in_looptijd, aflossing_annuitair, 0)
+    aflossing_lineair = np.where(in_looptijd, aflossing_lineair, 0)
+    hypo_saldo_aflossend = hypo_saldo_aflossend_ann + hypo_saldo_aflossend_lin
+    saldo = np.where(in_looptijd, hypo_saldo_aflossend + hypo_niet_aflossend, 0)
+    rente = saldo * im
+
+    return {
+        "im": im[:, 0],
+        "perioden_n": perioden_n,
+        "in_looptijd": in_looptijd,
+        "hypo_saldo_aflossend_ann": hypo_saldo_aflossend_ann,
+        "hypo_saldo_aflossend_lin": hypo_saldo_aflossend_lin,
+        "hypo_saldo_aflossend": hypo_saldo_aflossend,
+        "aflossing_annuitair": aflossing_annuitair,
+        "aflossing_lineair": aflossing_lineair,
+        "saldo": saldo,
+        "rente": rente,
+    }
+
+
+def calc_amortization_paths(
+    hypo_aflossend,
+    hypo_niet_aflossend,
+    looptijd_jaren: int,
+    perc_aflosvorm_annuitair,
+    perc_rente_paden,
+    rentevast_jaren: int,
+) -> dict:
+    """Calculate the monthly balances, interest and repayments for paths of interest rates.
+
+    The interest rate is fixed for periods of rentevast_jaren years. At the end of each period the
+    rate is reset and the annuity is recalculated for the remaining balance and term. The linear
+    repayments do not depend on the interest rate.
+
+    Args:
+        hypo_aflossend:             Repaying part of the loan [EUR].
+        hypo_niet_aflossend:        Interest-only part of the loan [EUR].
+        looptijd_jaren:             Term of the loan [years].
+        perc_aflosvorm_annuitair:   Annuity part of the repaying part of the loan [%].
+        perc_rente_paden:           (paths, periods) yearly interest rate per fixed-rate period [%].
+        rentevast_jaren:            Length of the fixed-rate periods [years].
+
+    Returns:
+        amortization:   As calc_amortization, with a (paths, months) monthly interest rate.
+    """
+    perc_rente_paden = np.atleast_2d(perc_rente_paden)
+    n_paths = len(perc_rente_paden)
+    looptijd_maanden = 12 * int(looptijd_jaren)
+    hypo_aflossend_ann = np.full(n_paths, perc_aflosvorm_annuitair / 100 * hypo_aflossend)
+    hypo_aflossend_lin = np.full(n_paths, hypo_aflossend - hypo_aflossend_ann[0])
+    periods = []
+
+    for start in range(0, looptijd_maanden, 12 * rentevast_jaren):
+        # Bereken het verloop voor de resterende looptijd en het resterende saldo, met de rente
+        # van deze rentevaste periode. Gebruik alleen de maanden van deze periode.
+        resterend_jaren = (looptijd_maanden - start) // 12
+        n_months = min(12 * rentevast_jaren, looptijd_maanden - start)
+        aflossend = hypo_aflossend_ann + hypo_aflossend_lin
+        perc_ann = np.divide(
+            100 * hypo_aflossend_ann, aflossend, out=np.full(n_paths, 100.0), where=aflossend > 0
+        )
+        period = calc_amortization(
+            aflossend,
+            hypo_niet_aflossend,
+            resterend_jaren,
+            perc_rente_paden[:, len(periods)],
+            perc_ann,
+        )
+
+        if n_months < 12 * resterend_jaren:
+            hypo_aflossend_ann = period["hypo_saldo_aflossend_ann"][:, n_months]
+            hypo_aflossend_lin = period["hypo_saldo_aflossend_lin"][:, n_months]
+
+        period["im"] = np.broadcast_to(period["im"][:, np.newaxis], (n_paths, n_months))
+        del period["perioden_n"]
+        periods.append({name: value[:, :n_months] for name, value in period.items()})
+
+    amortization = {name: np.hstack([period[name] for period in periods]) for name in periods[0]}
+    amortization["perioden_n"] = np.arange(0, looptijd_maanden, 1)
+
+    return amortization
+
+
+def calc_hillen_phase_out(today: datetime.date, n_months: int) -> np.ndarray:
+    """Calculate the deduction for a small or no home-ownership debt (Wet Hillen) per month.
+
+    The deduction only depends on the current month. It is calculated once per month and shared
+    by all callers, hence the returned array is read-only.
+
+    Args:
+        today:      Date of the first month.
+        n_months:   Number of months.
+
+    Returns:
+        afbouw:     Deduction percentage per month [%].
+    """
+    return _hillen_phase_out(today.year, today.month, n_months)
+
+
+@functools.lru_cache(maxsize=8)
+def _hillen_phase_out(year: int, month: int, n_months: int) -> np.ndarray:
+    afbouw_per_jaar = (AFTREK_HILLEN_INIT_YEAR - AFTREK_HILLEN_END_YEAR) / (
+        HILLEN_END_YEAR - HILLEN_INIT_YEAR
+    )
+    aftrek_curr_year = AFTREK_HILLEN_INIT_YEAR - (year - HILLEN_INIT_YEAR) * afbouw_per_jaar
+
+    # Afbouw wet Hillen werkt op jaarbasis, van januari tot januari - corrigeer hiervoor.
+    perioden_n = np.arange(month - 1, month - 1 + n_months, 1)
+    afbouw = np.maximum(aftrek_curr_year - np.floor(perioden_n / 12) * afbouw_per_jaar, 0)
+    afbouw.setflags(write=False)
+
+    return afbouw
+
+
+def calc_fiscal(
+    amortization: dict,
+    woz_waarde,
+    looptijd_fiscaal_aftrekbaar,
+    perc_forfait,
+    perc_voorlopigeteruggaaf,
+    perc_inflatie_woz,
+    today: datetime.date,
+) -> dict:
+    """Calculate the WOZ value, tax refund and imputed rental value per month.
+
+    The voorlopige teruggaaf and eigenwoningforfait are based on the repaying parts of the loan.
+
+    Args:
+        amortization:               Results of calc_amortization or calc_amortization_paths. For
+            a single scenario, the monthly results may also be given as 1-D arrays.
+        woz_waarde:                 WOZ value of the house [EUR].
+        looptijd_fiscaal_aftrekbaar: Remaining term of the tax deductibility [years].
+        perc_forfait:               Eigenwoningforfait [%].
+        perc_voorlopigeteruggaaf:   Tax rate of the voorlopige teruggaaf [%].
+        perc_inflatie_woz:          Yearly inflation of the WOZ value [%]. Use 0 for a constant
+            WOZ value. A (scenarios, months) array gives the inflation per month.
+        today:                      Date of the first month.
+
+    Returns:
+        fiscal:     The (scenarios, months) WOZ value, voorlopige teruggaaf and eigenwoningforfait.
+    """
+    perioden_n = amortization["perioden_n"]
+    in_looptijd = np.atleast_2d(amortization["in_looptijd"])
+    hypo_saldo_aflossend = np.atleast_2d(amortization["hypo_saldo_aflossend"])
+    im = np.asarray(amortization["im"])
+    im = im if im.ndim == 2 else im.reshape(-1, 1)
+    perc_inflatie_woz = np.asarray(perc_inflatie_woz)
+    woz_waarde, looptijd_fiscaal_aftrekbaar, perc_forfait, perc_vt = [
+        param[:, np.newaxis]
+        for param in np.broadcast_arrays(
+            *np.atleast_1d(
+                woz_waarde, looptijd_fiscaal_aftrekbaar, perc_forfait, perc_voorlopigeteruggaaf
+            )
+        )
+    ]
+
+    # Bepaal WOZ waarde over de looptijd: constant, of gecorrigeerd voor (instelbare) inflatie.
+    if perc_inflatie_woz.ndim == 2:
+        # Inflatie per maand: de groei is het product van de inflatie van de voorgaande maanden.
+        groei_woz = np.cumprod(1 + perc_inflatie_woz / 100 / 12, axis=1)
+        groei_woz = np.hstack([np.ones((len(groei_woz), 1)), groei_woz[:, :-1]])
+    else:
+        groei_woz = (1 + np.reshape(perc_inflatie_woz, (-1, 1)) / 100 / 12) ** perioden_n
+
+    woz_waarde_array = woz_waarde * groei_woz * in_looptijd
+
+    # Bereken de voorlopige teruggaaf en eigenwoningforfait (ex aftrek Hillen) op maandbasis.
+    fiscaal_vt = (
+        perc_vt
+        / 100
+        * hypo_saldo_aflossend
+        * im
+        * (perioden_n <= 12 * looptijd_fiscaal_aftrekbaar)
+    )
+    fiscaal_ew = woz_waarde_array * perc_forfait / 100 / 12 * perc_vt / 100
+
+    # Wordt minder rente betaald dan het eigenwoningforfait dat bijgeteld moet bijtellen? Dan
+    # bestaat recht op een aftrek vanwege geen of een kleine eigenwoningschuld (wet Hillen).
+    afbouw_hillen_array = calc_hillen_phase_out(today, len(perioden_n))
+    fiscaal_ew = np.where(
+        fiscaal_ew > fiscaal_vt,
+        fiscaal_ew - (fiscaal_ew - fiscaal_vt) * afbouw_hillen_array / 100,
+        fiscaal_ew,
+    )
+
+    return {"woz_waarde_array": woz_waarde_array, "fiscaal_vt": fiscaal_vt, "fiscaal_ew": fiscaal_ew}
+
+
+def calc_scenarios(
+    koopsom,
+    woz_waarde,
+    kosten_advies,
+    kosten_hypotheekakte,
+    kosten_keuring,
+    eigen_middelen,
+    looptijd_jaren,
+    looptijd_fiscaal_aftrekbaar,
+    toggle_nhg,
+    toggle_inflatie_woz,
+    perc_hypotheekrente,
+    perc_aflosvorm_annuitair,
+    perc_aflosvrij,
+    perc_overdrachtsbelasting,
+    perc_forfait,
+    perc_voorlopigeteruggaaf,
+    perc_tarief_nhg,
+    perc_inflatie_woz,
+    today: datetime.date | None = None,
+) -> dict:
+    """Calculate the monthly gross and net costs of one or more mortgage scenarios.
+
+    Args:
+        The inputs of the hypotheek planner form, see calc_loan, calc_amortization and
+        calc_fiscal. Each input is a scalar or a 1-D array with a value per scenario.
+        today:      Date of the first month. Defaults to the current date.
+
+    Returns:
+        results:    Results of calc_loan, calc_amortization and calc_fiscal, and the
+            (scenarios, months) bruto and netto monthly costs.
+    """
+    if today is None:
+        today = datetime.date.today()
+
+    loan = calc_loan(
+        koopsom,
+        kosten_advies,
+        kosten_hypotheekakte,
+        kosten_keuring,
+        eigen_middelen,
+        toggle_nhg,
+        perc_aflosvrij,
+        perc_overdrachtsbelasting,
+        perc_tarief_nhg,
+    )
+    amortization = calc_amortization(
+        loan["hypo_aflossend"],
+        loan["hypo_niet_aflossend"],
+        looptijd_jaren,
+        perc_hypotheekrente,
+        perc_aflosvorm_annuitair,
+    )
+    fiscal = calc_fiscal(
+        amortization,
+        woz_waarde,
+        looptijd_fiscaal_aftrekbaar,
+        perc_forfait,
+        perc_voorlopigeteruggaaf,
+        np.where(toggle_inflatie_woz, perc_inflatie_woz, 0),
+        today,
+    )
+
+    # Bepaling bruto en netto maandlasten.
+    bruto = (
+        amortization["rente"] + amortization["aflossing_annuitair"] + amortization["aflossing_lineair"]
+    )
+    netto = bruto + fiscal["fiscaal_ew"] - fiscal["fiscaal_vt"]
+
+    return {**loan, **amortization, **fiscal, "bruto": bruto, "netto": netto}
+
+
+def simulate_scenario(
+    scenario: dict,
+    n_paths: int,
+    rentevast_jaren: int,
+    sigma_rente: float,
+    sigma_inflatie_woz: float,
+    seed: int | None = None,
+    today: datetime.date | None = None,
+    max_workers: int | None = None,
+) -> dict:
+    """Monte Carlo simulation of the monthly net costs for stochastic interest rates and WOZ values.
+
+    The interest rate is reset at the end of each fixed-rate period. The yearly rates follow a
+    mean-reverting process around the rate of the scenario. The yearly inflation of the WOZ value
+    is normally distributed around the inflation of the scenario. The paths are calculated in
+    chunks, which are distributed over a process pool for a large number of paths.
+
+    Args:
+        scenario:           Inputs of calc_scenarios for a single scenario.
+        n_paths:            Number of paths.
+        rentevast_jaren:    Length of the fixed-rate periods [years].
+        sigma_rente:        Standard deviation of the yearly change of the interest rate [%].
+        sigma_inflatie_woz: Standard deviation of the yearly inflation of the WOZ value [%].
+        seed:               Seed of the random generator. Defaults to None.
+        today:              Date of the first month. Defaults to the current date.
+        max_workers:        Maximum number of processes. Defaults to the number of processors.
+
+    Returns:
+        simulation:     The percentiles and the (percentiles, months) netto monthly costs.
+    """
+    if today is None:
+        today = datetime.date.today()
+
+    # Deel de paden op in deelberekeningen, elk met een onafhankelijke random generator. De
+    # resultaten zijn daarmee onafhankelijk van het aantal processen.
+    chunk_sizes = [min(CHUNK_PATHS, n_paths - start) for start in range(0, n_paths, CHUNK_PATHS)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    chunk_args = [
+        (scenario, size, chunk_seed, rentevast_jaren, sigma_rente, sigma_inflatie_woz, today)
+        for size, chunk_seed in zip(chunk_sizes, seeds)
+    ]
+
+    # Netto maandlasten van alle paden in float32. Elke deelberekening wordt direct in deze array
+    # gekopieerd, zodat de resultaten van de deelberekeningen niet ook allemaal bewaard worden.
+    n_months = 12 * int(scenario["looptijd_jaren"])
+    netto = np.empty((n_paths, n_months), dtype=np.float32)
+    starts = np.cumsum([0] + chunk_sizes[:-1])
+
+    if n_paths >= PARALLEL_MIN_PATHS:
+        with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+            futures = {
+                executor.submit(_simulate_chunk, *args): start
+                for args, start in zip(chunk_args, starts)
+            }
+
+            for future in concurrent.futures.as_completed(futures):
+                start = futures.pop(future)
+                chunk = future.result()
+                netto[start : start + len(chunk)] = chunk
+    else:
+        for args, start in zip(chunk_args, starts):
+            netto[start : start + args[1]] = _simulate_chunk(*args)
+
+    return {
+        "percentiles": PERCENTILES,
+        "netto": np.percentile(netto, PERCENTILES, axis=0, overwrite_input=True),
+    }
+
+
+def _simulate_chunk(
+    scenario: dict,
+    n_paths: int,
+    seed: np.random.SeedSequence,
+    rentevast_jaren: int,
+    sigma_rente: float,
+    sigma_inflatie_woz: float,
+    today: datetime.date,
+) -> np.ndarray:
+    """Simulate the monthly net costs of a chunk of paths, see simulate_scenario.
+
+    Args:
+        scenario:           Inputs of calc_scenarios for a single scenario.
+        n_paths:            Number of paths of the chunk.
+        seed:               Seed sequence of the random generator of the chunk.
+        rentevast_jaren:    Length of the fixed-rate periods [years].
+        sigma_rente:        Standard deviation of the yearly change of the interest rate [%].
+        sigma_inflatie_woz: Standard deviation of the yearly inflation of the WOZ value [%].
+        today:              Date of the first month.
+
+    Returns:
+        netto:              (paths, months) monthly net costs [EUR], as float32.
+    """
+    rng = np.random.default_rng(seed)
+    looptijd_jaren = int(scenario["looptijd_jaren"])
+    n_periods = -(-looptijd_jaren // rentevast_jaren)
+
+    # Rente per jaar: mean reversion naar de rente van het scenario, niet negatief. De eerste
+    # rentevaste periode heeft de rente van het scenario.
+    perc_hypotheekrente = scenario["perc_hypotheekrente"]
+    rente = np.empty((n_paths, looptijd_jaren))
+    rente[:, 0] = perc_hypotheekrente
+
+    for jaar in range(1, looptijd_jaren):
+        rente[:, jaar] = np.maximum(
+            rente[:, jaar - 1]
+            + RATE_MEAN_REVERSION * (perc_hypotheekrente - rente[:, jaar - 1])
+            + sigma_rente * rng.standard_normal(n_paths),
+            0,
+        )
+
+    perc_rente_paden = rente[:, np.arange(n_periods) * rentevast_jaren]
+
+    # Inflatie WOZ waarde per jaar, omgezet naar maanden.
+    perc_inflatie_woz = scenario["perc_inflatie_woz"] if scenario["toggle_inflatie_woz"] else 0
+    inflatie_woz = perc_inflatie_woz + sigma_inflatie_woz * rng.standard_normal(
+        (n_paths, looptijd_jaren)
+    )
+
+    loan = calc_loan(
+        scenario["koopsom"],
+        scenario["kosten_advies"],
+        scenario["kosten_hypotheekakte"],
+        scenario["kosten_keuring"],
+        scenario["eigen_middelen"],
+        scenario["toggle_nhg"],
+        scenario["perc_aflosvrij"],
+        scenario["perc_overdrachtsbelasting"],
+        scenario["perc_tarief_nhg"],
+    )
+    amortization = calc_amortization_paths(
+        float(loan["hypo_aflossend"]),
+        float(loan["hypo_niet_aflossend"]),
+        looptijd_jaren,
+        scenario["perc_aflosvorm_annuitair"],
+        perc_rente_paden,
+        rentevast_jaren,
+    )
+    fiscal = calc_fiscal(
+        amortization,
+        scenario["woz_waarde"],
+        scenario["looptijd_fiscaal_aftrekbaar"],
+        scenario["perc_forfait"],
+        scenario["perc_voorlopigeteruggaaf"],
+        np.repeat(inflatie_woz, 12, axis=1),
+        today,
+    )
+
+    netto = amortization["rente"] + amortization["aflossing_annuitair"]
+    netto += amortization["aflossing_lineair"]
+    netto += fiscal["fiscaal_ew"] - fiscal["fiscaal_vt"]
+
+    return netto.astype(np.float32)
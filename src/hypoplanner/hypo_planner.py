@@ -5,9 +5,13 @@ MonkeyProof Solutions demo application, for Simian exploration purposes.
 Copyright 2020-2024 MonkeyProof Solutions BV.
 """
 
-import copy
 import datetime
+import functools
+import hashlib
+import itertools
+import logging
 import os
+import time
 
 import numpy as np
 import pandas as pd
@@ -16,6 +20,125 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from simian.gui import Form, component, utils
 
+from array_encoding import encode_array
+from hypoplanner import hypo_engine
+
+# Invoervelden van de planner.
+INPUT_KEYS = [
+    "koopsom",
+    "woz_waarde",
+    "kosten_advies",
+    "kosten_hypotheekakte",
+    "kosten_keuring",
+    "eigen_middelen",
+    "looptijd_jaren",
+    "looptijd_fiscaal_aftrekbaar",
+    "periode_selector",
+    "toggle_nhg",
+    "toggle_inflatie_woz",
+    "perc_hypotheekrente",
+    "perc_aflosvorm_annuitair",
+    "perc_aflosvrij",
+    "perc_overdrachtsbelasting",
+    "perc_forfait",
+    "perc_voorlopigeteruggaaf",
+    "perc_tarief_nhg",
+    "perc_inflatie_woz",
+    "toggle_simulatie",
+    "rentevast_jaren",
+    "sigma_rente",
+    "sigma_inflatie_woz",
+    "simulatie_paden",
+]
+
+# Dependency graph of the calculation stages: the inputs and stages each stage depends on. A stage
+# is only recalculated when one of the inputs it (indirectly) depends on has changed.
+STAGE_DEPENDENCIES = {
+    "hypotheek": [
+        "koopsom",
+        "kosten_advies",
+        "kosten_hypotheekakte",
+        "kosten_keuring",
+        "eigen_middelen",
+        "toggle_nhg",
+        "perc_aflosvrij",
+        "perc_overdrachtsbelasting",
+        "perc_tarief_nhg",
+    ],
+    "verloop": ["hypotheek", "looptijd_jaren", "perc_hypotheekrente", "perc_aflosvorm_annuitair"],
+    "fiscaal": [
+        "verloop",
+        "today",
+        "woz_waarde",
+        "looptijd_fiscaal_aftrekbaar",
+        "toggle_inflatie_woz",
+        "perc_forfait",
+        "perc_voorlopigeteruggaaf",
+        "perc_inflatie_woz",
+    ],
+    "tabel": ["fiscaal"],
+    "simulatie": [
+        "fiscaal",
+        "toggle_simulatie",
+        "rentevast_jaren",
+        "sigma_rente",
+        "sigma_inflatie_woz",
+        "simulatie_paden",
+    ],
+    "grafieken": ["tabel", "simulatie"],
+    "vergelijk": ["tabel", "hold_netto_maandlast"],
+    "verdeling": ["tabel", "periode_selector"],
+    "rapport": ["tabel"],
+}
+
+LOOPTIJD_MAX_JAREN = 30
+
+# Risicosimulatie: vaste seed, zodat een herberekening dezelfde uitkomsten geeft, en de banden van
+# percentielen van de netto maandlasten met hun kleur.
+SIMULATIE_SEED = 2024
+SIMULATIE_BANDEN = [(5, 95, "rgba(171, 99, 250, 0.15)"), (25, 75, "rgba(171, 99, 250, 0.3)")]
+
+# Aantal maanden per pagina van het hypotheekverloop (rapport).
+RAPPORT_PAGINA_MAANDEN = 12
+
+# Kolommen van het hypotheekverloop in euro's.
+REPORT_EURO_COLUMNS = ["saldo", "woz", "rente", "aflossing", "vt", "ew", "bruto", "netto"]
+
+# Lijngrafieken: kolommen (traces) en titel.
+LINE_FIGURES = {
+    "plot_verloop_lasten": (["rente", "aflossing", "bruto", "netto"], "Maandlasten"),
+    "plot_verloop_hypotheek": (["saldo", "woz"], "Uitstaand saldo en WOZ waarde"),
+    "plot_lastenvergelijk": (["bewaard", "huidig"], "Voorstel vergelijker"),
+}
+
+# Opbouw van de sunburst van de kostenverdeling.
+SUNBURST_LABELS = [
+    "Verdeling",
+    "Rente",
+    "Aflossing",
+    "Fiscaal",
+    "Aflosvrij",
+    "Lineair ",
+    "Annuitair ",
+    "Lineair",
+    "Annuitair",
+    "VT [ontvangen]",
+    "EW forfait [betalen]",
+]
+SUNBURST_PARENTS = [
+    "",
+    "Verdeling",
+    "Verdeling",
+    "Verdeling",
+    "Rente",
+    "Rente",
+    "Rente",
+    "Aflossing",
+    "Aflossing",
+    "Fiscaal",
+    "Fiscaal",
+]
+
 if __name__ == "__main__":
     from simian.local import Uiformio
     Uiformio("hypo_planner", window_title="MonkeyProof Solutions")
@@ -25,6 +148,8 @@ def gui_init(meta_data: dict) -> dict:
     # Create the form and load the json builder into it.
     Form.componentInitializer(app_pic_hypo_planner=init_app_toplevel_pic)
     Form.componentInitializer(periode_selector=init_periode_selector)
+    Form.componentInitializer(hold_scenario=init_hold_scenario)
+    Form.componentInitializer(rapport_jaar=init_rapport_jaar)
     Form.componentInitializer(hypo_verloop_table_report=init_hypo_verloop_table_report)
     Form.componentInitializer(plot_verloop_lasten=init_plot_verloop_lasten)
     Form.componentInitializer(plot_verloop_hypotheek=init_plot_verloop_hypotheek)
@@ -40,109 +165,127 @@ def init_periode_selector(comp: component.Slider):
     comp.properties = {"triggerHappy": "update_period_selection", "debounceTime": 1000}
 
 
+def init_hold_scenario(comp: component.Select):
+    # Define a TriggerHappy event, to immediately compare with the selected hold-scenario.
+    comp.properties = {"triggerHappy": "update_hold_selection"}
+
+
+def init_rapport_jaar(comp: component.Slider):
+    # Define a TriggerHappy event, to show the page of the selected year of the report.
+    comp.properties = {"triggerHappy": "update_report_page", "debounceTime": 500}
+
+
 def init_hypo_verloop_table():
     # Initialize results table.
-    today = datetime.date.today()
-    looptijd_maanden = 12 * 30
+    looptijd_maanden = 12 * LOOPTIJD_MAX_JAREN
     perioden_n = np.arange(0, looptijd_maanden, 1)
-    perioden_m = pd.bdate_range(start=today, periods=looptijd_maanden, freq="MS").to_pydatetime()
-    perioden_s = [dt.strftime("%Y-%m") for dt in perioden_m]
+    perioden_s = get_calendar(datetime.date.today())["perioden_s"]
     zeros_looptijd = np.zeros(len(perioden_n))
 
     hypo_verloop_table = pd.DataFrame(
-        list(
-            zip(
-                perioden_n,
-                perioden_s,
-                zeros_looptijd,
-                zeros_looptijd,
-                zeros_looptijd,
-                zeros_looptijd,
-                zeros_looptijd,
-                zeros_looptijd,
-                zeros_looptijd,
-                zeros_looptijd,
-            )
-        ),
-        columns=["id", "datum", "saldo", "woz", "rente", "aflossing", "vt", "ew", "bruto", "netto"],
+        {
+            "id": perioden_n,
+            "datum": perioden_s,
+            **{name: zeros_looptijd for name in REPORT_EURO_COLUMNS},
+        }
     )
 
     return hypo_verloop_table
 
 
+def get_calendar(today: datetime.date) -> dict:
+    # Months of the maximum looptijd, starting at the first month after today (or today, when it is
+    # the first day of the month). Shared by all sessions and only recalculated when the first
+    # month changes.
+    return _calendar(today.year, today.month, today.day == 1)
+
+
+@functools.lru_cache(maxsize=2)
+def _calendar(year: int, month: int, is_first_day: bool) -> dict:
+    first_month = np.datetime64(f"{year:04d}-{month:02d}", "M") + (0 if is_first_day else 1)
+    months = first_month + np.arange(0, 12 * LOOPTIJD_MAX_JAREN, 1)
+
+    return {
+        "perioden_m": tuple(months.astype("datetime64[us]").tolist()),
+        "perioden_s": tuple(months.astype(str).tolist()),
+    }
+
+
 def init_plot_verloop_lasten(comp: component.Plotly):
     # Initialize maandlasten plot.
-    hypo_verloop_table = init_hypo_verloop_table()
-    comp.figure = px.scatter(
-        hypo_verloop_table,
-        x="datum",
-        y=["rente", "aflossing", "bruto", "netto"],
-        title="Maandlasten",
-    )
-    comp.figure.update_layout(yaxis_tickprefix="€", yaxis_title="Euro")
+    comp.figure = fill_line_figure("plot_verloop_lasten", init_hypo_verloop_table())
 
 
 def init_plot_verloop_hypotheek(comp: component.Plotly):
     # Initialize hypotheek-verloop plot (saldi).
-    hypo_verloop_table = init_hypo_verloop_table()
-    comp.figure = px.scatter(
-        hypo_verloop_table,
-        x="datum",
-        y=["rente", "aflossing", "bruto", "netto"],
-        title="Uitstaand saldo en WOZ waarde",
-    )
-    comp.figure.update_layout(yaxis_tickprefix="€", yaxis_title="Euro")
+    comp.figure = fill_line_figure("plot_verloop_hypotheek", init_hypo_verloop_table())
 
 
 def init_plot_kostenverdeling(comp: component.Plotly):
     # Initialize kosten-breakdown plot.
-    comp.figure = make_subplots(rows=1, cols=1, specs=[[{"type": "domain"}]])
-    comp.figure.add_trace(
-        go.Sunburst(
-            labels=[
-                "Verdeling",
-                "Rente",
-                "Aflossing",
-                "Fiscaal",
-                "Aflosvrij",
-                "Lineair ",
-                "Annuitair ",
-                "Lineair",
-                "Annuitair",
-                "VT [ontvangen]",
-                "EW forfait [betalen]",
-            ],
-            parents=[
-                "",
-                "Verdeling",
-                "Verdeling",
-                "Verdeling",
-                "Rente",
-                "Rente",
-                "Rente",
-                "Aflossing",
-                "Aflossing",
-                "Fiscaal",
-                "Fiscaal",
-            ],
-            values=[0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        ),
-        1,
-        1,
-    )
-    comp.figure.update_layout(yaxis_tickprefix="€", title_text="Maandlasten verdeling")
+    comp.figure = fill_figure("plot_kostenverdeling", [{"values": [0] * len(SUNBURST_LABELS)}])
 
 
 def init_plot_lastenvergelijk(comp: component.Plotly):
     # Initialize scenario-vergelijk plot.
     hypo_verloop_table = init_hypo_verloop_table()
-    comp.figure = px.scatter(
-        hypo_verloop_table,
-        x="datum",
-        y=["rente", "aflossing", "bruto", "netto"],
-        title="Voorstel vergelijker",
+    comp.figure = fill_line_figure(
+        "plot_lastenvergelijk",
+        {
+            "datum": hypo_verloop_table["datum"],
+            "bewaard": hypo_verloop_table["netto"],
+            "huidig": hypo_verloop_table["netto"],
+        },
     )
-    comp.figure.update_layout(yaxis_tickprefix="€", yaxis_title="Euro")
+
+
+@functools.lru_cache(maxsize=None)
+def _figure_template(key: str) -> dict:
+    # Build the figure of a Plotly component once, and keep its (validated) dict as template.
+    # Line figures are built for the maximum looptijd, as that determines the trace type.
+    if key in LINE_FIGURES:
+        columns, title = LINE_FIGURES[key]
+        figure = px.scatter(
+            init_hypo_verloop_table().assign(bewaard=0.0, huidig=0.0),
+            x="datum",
+            y=columns,
+            title=title,
+        )
+        figure.update_layout(yaxis_tickprefix="€", yaxis_title="Euro")
+
+    else:
+        # Create subplots: use "domain" type for Pie subplot.
+        figure = make_subplots(rows=1, cols=1, specs=[[{"type": "domain"}]])
+        figure.add_trace(
+            go.Sunburst(
+                labels=SUNBURST_LABELS,
+                parents=SUNBURST_PARENTS,
+                values=[0] * len(SUNBURST_LABELS),
+            ),
+            1,
+            1,
+        )
+        figure.update_layout(yaxis_tickprefix="€", title_text="Maandlasten verdeling")
+
+    return figure.to_dict()
+
+
+def fill_figure(key: str, trace_data: list[dict]) -> go.Figure:
+    # Create the figure of a Plotly component from its template, replacing the data of its traces.
+    # The template has been validated when it was built, hence validation is skipped here.
+    template = _figure_template(key)
+    data = [{**trace, **new_data} for trace, new_data in zip(template["data"], trace_data)]
+
+    return go.Figure({"data": data, "layout": template["layout"]}, _validate=False)
+
+
+def fill_line_figure(key: str, table) -> go.Figure:
+    # Create a line figure with the "datum" column on the x-axis and a trace per column. The
+    # y-values are sent as compact float32 typed arrays, which Plotly decodes in the browser.
+    columns, _ = LINE_FIGURES[key]
+    x = np.asarray(table["datum"])
+
+    return fill_figure(key, [{"x": x, "y": encode_array(table[name])} for name in columns])
 
 
 def init_hypo_verloop_table_report(comp: component.DataTables):
@@ -162,6 +305,8 @@ def init_hypo_verloop_table_report(comp: component.DataTables):
     ]
     columnIDs = ["id", "datum", "saldo", "woz", "rente", "aflossing", "vt", "ew", "bruto", "netto"]
     comp.setColumns(columnNames, columnIDs)
+    # Only the page of the selected year is sent to the table.
+    comp.setFeatures(paging=False)
     comp.defaultValue = [
         {
             "id": 0,
@@ -188,381 +333,505 @@ def init_app_toplevel_pic(comp: component.HtmlElement):
 
 def gui_event(meta_data: dict, payload: dict) -> dict:
     # Application event handler.
-    Form.eventHandler(calculate_button=calc_update, update_period_selection=calc_update)
+    Form.eventHandler(
+        calculate_button=calc_update,
+        update_period_selection=calc_period_update,
+        update_hold_selection=calc_update,
+        update_report_page=show_report_page,
+    )
     callback = utils.getEventFunction(meta_data, payload)
     return callback(meta_data, payload)
 
 
 def calc_update(meta_data: dict, payload: dict) -> dict:
     # Update both numerical and graph results.
-    # 1. Start updating the tool:
-    # 1A. Fetch output variables.
-    hold_netto_maandlast, _ = utils.getSubmissionData(payload, key="hold_netto_maandlast")
-    hold_netto_maandlast = np.array(hold_netto_maandlast)
-
-    # 1B. Fetch graph objects.
+    # 1. Start updating the tool: fetch the input variables and graph objects.
+    inputs, payload = get_inputs(meta_data, payload)
     plot_verloop_lasten, _ = utils.getSubmissionData(payload, "plot_verloop_lasten")
     plot_verloop_hypotheek, _ = utils.getSubmissionData(payload, "plot_verloop_hypotheek")
     plot_kostenverdeling, _ = utils.getSubmissionData(payload, "plot_kostenverdeling")
     plot_lastenvergelijk, _ = utils.getSubmissionData(payload, "plot_lastenvergelijk")
 
-    # 1C. Fetch the input variables.
-    koopsom, _ = utils.getSubmissionData(payload, key="koopsom")
-    woz_waarde, _ = utils.getSubmissionData(payload, key="woz_waarde")
-    kosten_advies, _ = utils.getSubmissionData(payload, key="kosten_advies")
-    kosten_hypotheekakte, _ = utils.getSubmissionData(payload, key="kosten_hypotheekakte")
-    kosten_keuring, _ = utils.getSubmissionData(payload, key="kosten_keuring")
-    eigen_middelen, _ = utils.getSubmissionData(payload, key="eigen_middelen")
-    looptijd_jaren, _ = utils.getSubmissionData(payload, key="looptijd_jaren")
-    looptijd_fiscaal_aftrekbaar, _ = utils.getSubmissionData(
-        payload, key="looptijd_fiscaal_aftrekbaar"
+    # 2. - 4. Doorloop de rekenstappen.
+    results = run_stages(meta_data, inputs)
+    hypotheek = results["hypotheek"]
+    hypo_verloop_table = results["tabel"]
+    hypo_verloop_table_report = results["rapport"]
+    plot_verloop_lasten.figure, plot_verloop_hypotheek.figure = results["grafieken"]
+    plot_lastenvergelijk.figure = results["vergelijk"]
+    plot_kostenverdeling.figure = results["verdeling"]
+
+    # 5. Updaten van output sections en weergave prep:
+    # 5A. Update plots.
+    payload, _ = utils.setSubmissionData(payload, "plot_verloop_lasten", plot_verloop_lasten)
+    payload, _ = utils.setSubmissionData(payload, "plot_verloop_hypotheek", plot_verloop_hypotheek)
+    payload, _ = utils.setSubmissionData(payload, "plot_kostenverdeling", plot_kostenverdeling)
+    payload, _ = utils.setSubmissionData(payload, "plot_lastenvergelijk", plot_lastenvergelijk)
+
+    # 5B. Update numerical outputs. Format and update hypotheek verloop table (reporting).
+    payload, _ = utils.setSubmissionData(payload, "hypo_benodigd", hypotheek["hypo_benodigd"])
+    payload, _ = utils.setSubmissionData(
+        payload, "overdrachtsbelasting", hypotheek["overdrachtsbelasting"]
     )
-    period_select, _ = utils.getSubmissionData(payload, key="periode_selector")
-    toggle_nhg, _ = utils.getSubmissionData(payload, key="toggle_nhg")
-    toggle_inflatie_woz, _ = utils.getSubmissionData(payload, key="toggle_inflatie_woz")
-    perc_hypotheekrente, _ = utils.getSubmissionData(payload, key="perc_hypotheekrente")
-    perc_aflosvorm_annuitair, _ = utils.getSubmissionData(payload, key="perc_aflosvorm_annuitair")
-    perc_aflosvrij, _ = utils.getSubmissionData(payload, key="perc_aflosvrij")
-    perc_overdrachtsbelasting, _ = utils.getSubmissionData(payload, key="perc_overdrachtsbelasting")
-    perc_forfait, _ = utils.getSubmissionData(payload, key="perc_forfait")
-    perc_voorlopigeteruggaaf, _ = utils.getSubmissionData(payload, key="perc_voorlopigeteruggaaf")
-    perc_tarief_nhg, _ = utils.getSubmissionData(payload, key="perc_tarief_nhg")
-    perc_inflatie_woz, _ = utils.getSubmissionData(payload, key="perc_inflatie_woz")
-
-    looptijd_max_jaren = 30
-    looptijd_maanden = 12 * looptijd_jaren
-
-    # Corrigeer periode-selector voor user-gedefinieerde looptijd.
-    if period_select > looptijd_maanden:
-        # De selector overschrijdt de looptijd - breng terug naar laatste maand.
-        period_select = looptijd_maanden
-        payload, _ = utils.setSubmissionData(payload, "periode_selector", period_select)
+    payload, _ = utils.setSubmissionData(payload, "kosten_nhg", hypotheek["kosten_nhg"])
+    payload, _ = utils.setSubmissionData(payload, "brutolast", sum(hypo_verloop_table["bruto"]))
+    payload, _ = utils.setSubmissionData(payload, "nettolast", sum(hypo_verloop_table["netto"]))
+    payload = set_report_page(payload, hypo_verloop_table_report)
 
-    period_select -= 1
+    return payload
 
-    # 2. Bepaal benodigde hypotheek:
-    # 2A. Bepaal overdrachtsbelasting en daarna kosten koper.
-    overdrachtsbelasting = perc_overdrachtsbelasting / 100 * koopsom
-    kosten_koper = kosten_advies + kosten_hypotheekakte + kosten_keuring + overdrachtsbelasting
 
-    # 2B. Bepaal hoogte financiering en kosten NHG.
-    hypotheek_ex_nhg = koopsom + kosten_koper - eigen_middelen
+def calc_period_update(meta_data: dict, payload: dict) -> dict:
+    # Update the kostenverdeling plot for the selected period. It is the only output that depends
+    # on the period, hence the other outputs are left as they are. When other inputs have changed
+    # since the last calculation, all outputs are updated.
+    start_time = time.perf_counter()
+    inputs, payload = get_inputs(meta_data, payload)
+    stage_cache, is_found = utils.getCache(meta_data, "calc_stages")
 
-    if toggle_nhg == True:
-        hypo_benodigd = hypotheek_ex_nhg / (1 - perc_tarief_nhg / 100)
-        kosten_nhg = perc_tarief_nhg / 100 * hypo_benodigd
-    else:
-        hypo_benodigd = hypotheek_ex_nhg
-        kosten_nhg = 0
+    if not is_found or not _stages_up_to_date(stage_cache, inputs, exclude=["verdeling"]):
+        payload = calc_update(meta_data, payload)
+        _record_request(meta_data, "update_period_selection", start_time, "full")
+        return payload
 
-    hypo_aflossend = (1 - perc_aflosvrij / 100) * hypo_benodigd
-    hypo_niet_aflossend = hypo_benodigd - hypo_aflossend
+    plot_kostenverdeling, _ = utils.getSubmissionData(payload, "plot_kostenverdeling")
+    plot_kostenverdeling.figure = run_stages(meta_data, inputs)["verdeling"]
+    payload, _ = utils.setSubmissionData(payload, "plot_kostenverdeling", plot_kostenverdeling)
+    _record_request(meta_data, "update_period_selection", start_time, "processed")
 
-    # 3. Bepaal hypotheekverloop en maandlasten:
-    # 3A. Bepaal hypotheekrente op maandbasis.
-    # im : interest per month.
-    today = datetime.date.today()
-    perioden_n = np.arange(0, looptijd_maanden, 1)
-    perioden_m = pd.bdate_range(start=today, periods=looptijd_maanden, freq="MS").to_pydatetime()
-    perioden_s = [dt.strftime("%Y-%m") for dt in perioden_m]
-    im = perc_hypotheekrente / 100 / 12
-
-    # 3B. Bereken saldi en lasten.
-    zeros_perioden_n = np.zeros(len(perioden_n))
-    ones_perioden_n = np.ones(len(perioden_n))
-    hypo_saldo_aflossend_ann, hypo_saldo_aflossend_lin, aflossing_annuitair, aflossing_lineair = [
-        zeros_perioden_n for _ in range(4)
-    ]
+    return payload
 
-    if perc_aflosvorm_annuitair == 100:
-        # Zuiver annuitair.
-        # Bepaal de mensualiteit (mst) en het saldo over de perioden.
-        mst = hypo_aflossend * im / (1 - (1 + im) ** -looptijd_maanden)
-        hypo_saldo_aflossend_ann = ((1 + im) ** perioden_n) * hypo_aflossend + mst / im * (
-            1 - (1 + im) ** perioden_n
-        )
-        hypo_saldo_aflossend = hypo_saldo_aflossend_ann
-        aflossing_annuitair = mst - (im * hypo_saldo_aflossend_ann)
 
-    elif perc_aflosvorm_annuitair == 0:
-        # Zuiver lineair.
-        aflos_lin_maand = hypo_aflossend / looptijd_maanden
-        hypo_saldo_aflossend_lin = hypo_aflossend - (aflos_lin_maand * perioden_n)
-        hypo_saldo_aflossend = hypo_saldo_aflossend_ann + hypo_saldo_aflossend_lin
-        aflossing_lineair = aflos_lin_maand * ones_perioden_n
+def _stages_up_to_date(stage_cache: dict, inputs: dict, exclude: list) -> bool:
+    # Whether all stages, except the excluded ones, have been calculated for the given inputs.
+    return all(
+        name in stage_cache and stage_cache[name][0] == _stage_key(name, inputs)
+        for name in STAGE_DEPENDENCIES
+        if name not in exclude
+    )
 
-    else:
-        # Mix lineair en annuitair.
-        hypo_aflossend_ann = perc_aflosvorm_annuitair / 100 * hypo_aflossend
-        hypo_aflossend_lin = hypo_aflossend - hypo_aflossend_ann
-
-        # Annuitair: mensualiteit, saldo en aflossing.
-        mst = hypo_aflossend_ann * im / (1 - (1 + im) ** -looptijd_maanden)
-        hypo_saldo_aflossend_ann = ((1 + im) ** perioden_n) * hypo_aflossend_ann + mst / im * (
-            1 - (1 + im) ** perioden_n
-        )
-        aflossing_annuitair = mst - (im * hypo_saldo_aflossend_ann)
 
-        # Lineair: aflossing en saldo.
-        aflos_lin_maand = hypo_aflossend_lin / looptijd_maanden
-        hypo_saldo_aflossend_lin = hypo_aflossend_lin - (aflos_lin_maand * perioden_n)
-        aflossing_lineair = aflos_lin_maand * ones_perioden_n
+def _record_request(meta_data: dict, event: str, start_time: float, result: str) -> None:
+    # Keep the number of requests per result and their timing for the event in the session.
+    elapsed = (time.perf_counter() - start_time) * 1000
+    request_metrics, is_found = utils.getCache(meta_data, "request_metrics")
+    if not is_found:
+        request_metrics = {}
 
-        # Totaal aflossend saldo en aflossing.
-        hypo_saldo_aflossend = hypo_saldo_aflossend_ann + hypo_saldo_aflossend_lin
+    metrics = request_metrics.setdefault(event, {"total_ms": 0.0, "max_ms": 0.0})
+    metrics[result] = metrics.get(result, 0) + 1
+    metrics["total_ms"] += elapsed
+    metrics["max_ms"] = max(metrics["max_ms"], elapsed)
+    utils.setCache(meta_data, "request_metrics", request_metrics)
 
-    saldo = hypo_saldo_aflossend + hypo_niet_aflossend
-    rente = saldo * im
+    logging.debug("%s request %s in %.1f ms: %s", event, result, elapsed, metrics)
 
-    # 3C. Berekening fiscaliteiten: voorlopige teruggaaf en eigenwoningforfait, op basis van aflossende hypotheekdelen.
-    # Bepaal WOZ waarde over de looptijd: constant, of gecorrigeerd voor (instelbare) inflatie.
-    if toggle_inflatie_woz == True:
-        woz_waarde_array = woz_waarde * (1 + perc_inflatie_woz / 100 / 12) ** perioden_n
-    else:
-        woz_waarde_array = woz_waarde * ones_perioden_n
-
-    # Bereken de voorlopige teruggaaf en eigenwoningforfait (ex aftrek Hillen) op maandbasis.
-    fiscaal_vt = (
-        perc_voorlopigeteruggaaf
-        / 100
-        * hypo_saldo_aflossend
-        * im
-        * (perioden_n <= 12 * looptijd_fiscaal_aftrekbaar)
-    )
-    fiscaal_ew = woz_waarde_array * perc_forfait / 100 / 12 * perc_voorlopigeteruggaaf / 100
-
-    # Wordt minder rente betaald dan het eigenwoningforfait dat bijgeteld moet bijtellen? Dan bestaat recht op
-    # een aftrek vanwege geen of een kleine eigenwoningschuld (wet Hillen).
-    toepassen_wet_hillen = fiscaal_ew > fiscaal_vt
-
-    # Uitwerking afbouw Wet Hillen [2024 - 2048].
-    hillen_init_year = 2024
-    hillen_end_year = 2048
-    aftrek_hillen_init_year = 80
-    aftrek_hillen_end_year = 0
-    afbouw_per_jaar = (aftrek_hillen_init_year - aftrek_hillen_end_year) / (
-        hillen_end_year - hillen_init_year
+
+def get_inputs(meta_data: dict, payload: dict) -> tuple[dict, dict]:
+    # 1A. Fetch the input variables and the netto maandlast of the selected "hold" scenario.
+    inputs = {key: utils.getSubmissionData(payload, key=key)[0] for key in INPUT_KEYS}
+    hold_scenario = _get_hold_scenario(meta_data, payload)
+    inputs["hold_netto_maandlast"] = tuple(hold_scenario["netto"]) if hold_scenario else ()
+    inputs["today"] = datetime.date.today()
+
+    # 1B. Corrigeer periode-selector voor user-gedefinieerde looptijd.
+    looptijd_maanden = 12 * inputs["looptijd_jaren"]
+
+    if inputs["periode_selector"] > looptijd_maanden:
+        # De selector overschrijdt de looptijd - breng terug naar laatste maand.
+        inputs["periode_selector"] = looptijd_maanden
+        payload, _ = utils.setSubmissionData(payload, "periode_selector", looptijd_maanden)
+
+    return inputs, payload
+
+
+def run_stages(meta_data: dict, inputs: dict) -> dict:
+    # Run the calculation stages. Stages whose inputs did not change are taken from the cache of
+    # the session.
+    stage_cache, is_found = utils.getCache(meta_data, "calc_stages")
+    if not is_found:
+        stage_cache = {}
+
+    hypotheek = _run_stage(stage_cache, "hypotheek", inputs, calc_hypotheek)
+    verloop = _run_stage(stage_cache, "verloop", inputs, calc_verloop, hypotheek)
+    fiscaal = _run_stage(stage_cache, "fiscaal", inputs, calc_fiscaal, verloop)
+    hypo_verloop_table = _run_stage(stage_cache, "tabel", inputs, calc_tabel, verloop, fiscaal)
+    simulatie = _run_stage(stage_cache, "simulatie", inputs, calc_simulatie)
+    results = {
+        "hypotheek": hypotheek,
+        "tabel": hypo_verloop_table,
+        "grafieken": _run_stage(
+            stage_cache, "grafieken", inputs, calc_grafieken, hypo_verloop_table, simulatie
+        ),
+        "vergelijk": _run_stage(
+            stage_cache, "vergelijk", inputs, calc_vergelijk, hypo_verloop_table
+        ),
+        "verdeling": _run_stage(
+            stage_cache, "verdeling", inputs, calc_verdeling, hypotheek, verloop, hypo_verloop_table
+        ),
+        "rapport": _run_stage(stage_cache, "rapport", inputs, calc_rapport, hypo_verloop_table),
+    }
+
+    utils.setCache(meta_data, "calc_stages", stage_cache)
+
+    return results
+
+
+def _stage_key(name: str, inputs: dict) -> tuple:
+    # Collect the values of all inputs the stage (indirectly) depends on.
+    key = []
+
+    for dependency in STAGE_DEPENDENCIES[name]:
+        if dependency in STAGE_DEPENDENCIES:
+            key.extend(_stage_key(dependency, inputs))
+        else:
+            key.append(inputs[dependency])
+
+    return tuple(key)
+
+
+def _run_stage(stage_cache: dict, name: str, inputs: dict, calc_stage, *stage_results):
+    # Return the cached result of a stage, or recalculate it when its inputs have changed.
+    key = _stage_key(name, inputs)
+
+    if name not in stage_cache or stage_cache[name][0] != key:
+        stage_cache[name] = (key, calc_stage(inputs, *stage_results))
+
+    return stage_cache[name][1]
+
+
+def calc_hypotheek(inputs: dict) -> dict:
+    # 2. Bepaal benodigde hypotheek.
+    loan = hypo_engine.calc_loan(
+        inputs["koopsom"],
+        inputs["kosten_advies"],
+        inputs["kosten_hypotheekakte"],
+        inputs["kosten_keuring"],
+        inputs["eigen_middelen"],
+        inputs["toggle_nhg"],
+        inputs["perc_aflosvrij"],
+        inputs["perc_overdrachtsbelasting"],
+        inputs["perc_tarief_nhg"],
     )
-    aftrek_curr_year = aftrek_hillen_init_year - (today.year - hillen_init_year) * afbouw_per_jaar
-    perioden_array_max_looptijd = np.arange(0, 12 * (looptijd_max_jaren + 1), 1)
-    afbouw_hillen_array_max_looptijd = np.maximum(
-        aftrek_curr_year - np.floor(perioden_array_max_looptijd / 12) * afbouw_per_jaar,
-        np.zeros(len(perioden_array_max_looptijd)),
+
+    return {name: float(value) for name, value in loan.items()}
+
+
+def calc_verloop(inputs: dict, hypotheek: dict) -> dict:
+    # 3. Bepaal hypotheekverloop en maandlasten (enkel scenario).
+    verloop = hypo_engine.calc_amortization(
+        hypotheek["hypo_aflossend"],
+        hypotheek["hypo_niet_aflossend"],
+        inputs["looptijd_jaren"],
+        inputs["perc_hypotheekrente"],
+        inputs["perc_aflosvorm_annuitair"],
     )
 
-    # Afbouw wet Hillen werkt op jaarbasis, van januari tot januari - corrigeer hiervoor.
-    offset_huidige_maand = today.month - 1
-    afbouw_hillen_array = afbouw_hillen_array_max_looptijd[
-        offset_huidige_maand : offset_huidige_maand + looptijd_maanden
-    ]
+    return _first_scenario(verloop)
+
 
-    # Toepassen aftrek voor kleine- of geen eigenwoningschuld (Hillen).
-    fiscaal_ew_korting_wet_hillen = fiscaal_ew - np.multiply(
-        (fiscaal_ew - fiscaal_vt), afbouw_hillen_array / 100
+def calc_fiscaal(inputs: dict, verloop: dict) -> dict:
+    # 3C. Berekening fiscaliteiten: voorlopige teruggaaf en eigenwoningforfait (incl. wet Hillen).
+    fiscaal = hypo_engine.calc_fiscal(
+        verloop,
+        inputs["woz_waarde"],
+        inputs["looptijd_fiscaal_aftrekbaar"],
+        inputs["perc_forfait"],
+        inputs["perc_voorlopigeteruggaaf"],
+        inputs["perc_inflatie_woz"] if inputs["toggle_inflatie_woz"] == True else 0,
+        inputs["today"],
     )
-    fiscaal_ew[toepassen_wet_hillen] = fiscaal_ew_korting_wet_hillen[toepassen_wet_hillen]
 
+    return _first_scenario(fiscaal)
+
+
+def _first_scenario(results: dict) -> dict:
+    # The engine calculates (scenarios, months) arrays. Take the first (and only) scenario.
+    results = {name: value[0] if np.ndim(value) == 2 else value for name, value in results.items()}
+
+    if "im" in results:
+        results["im"] = float(results["im"][0])
+
+    return results
+
+
+def calc_tabel(inputs: dict, verloop: dict, fiscaal: dict) -> pd.DataFrame:
     # 3D. Bepaling bruto en netto maandlasten:
-    bruto = rente + aflossing_annuitair + aflossing_lineair
-    netto = rente + aflossing_annuitair + aflossing_lineair + fiscaal_ew - fiscaal_vt
+    perioden_n = verloop["perioden_n"]
+    aflossing = verloop["aflossing_annuitair"] + verloop["aflossing_lineair"]
+    bruto = verloop["rente"] + aflossing
+    netto = bruto + fiscaal["fiscaal_ew"] - fiscaal["fiscaal_vt"]
+
+    perioden_s = get_calendar(inputs["today"])["perioden_s"][: len(perioden_n)]
 
     # 4. Bepalen numerieke uitkomsten en updaten graphs.
     # 4A. Definitie hypotheek-verloop-tabel.
     hypo_verloop_table = pd.DataFrame(
-        list(
-            zip(
-                perioden_n,
-                perioden_s,
-                saldo,
-                woz_waarde_array,
-                rente,
-                (aflossing_annuitair + aflossing_lineair),
-                fiscaal_vt,
-                fiscaal_ew,
-                bruto,
-                netto,
-            )
-        ),
-        columns=["id", "datum", "saldo", "woz", "rente", "aflossing", "vt", "ew", "bruto", "netto"],
+        {
+            "id": perioden_n,
+            "datum": perioden_s,
+            "saldo": verloop["saldo"],
+            "woz": fiscaal["woz_waarde_array"],
+            "rente": verloop["rente"],
+            "aflossing": aflossing,
+            "vt": fiscaal["fiscaal_vt"],
+            "ew": fiscaal["fiscaal_ew"],
+            "bruto": bruto,
+            "netto": netto,
+        }
+    )
+
+    return hypo_verloop_table
+
+
+def calc_simulatie(inputs: dict) -> dict | None:
+    # 3E. Risicosimulatie: spreiding van de maandlasten voor een wisselende rente en WOZ waarde.
+    if not inputs["toggle_simulatie"]:
+        return None
+
+    return hypo_engine.simulate_scenario(
+        {key: inputs[key] for key in INPUT_KEYS},
+        int(inputs["simulatie_paden"]),
+        int(inputs["rentevast_jaren"]),
+        inputs["sigma_rente"],
+        inputs["sigma_inflatie_woz"],
+        seed=SIMULATIE_SEED,
+        today=inputs["today"],
     )
 
+
+def calc_grafieken(
+    _inputs: dict, hypo_verloop_table: pd.DataFrame, simulatie: dict | None
+) -> tuple:
+    # 4C. Updaten van result graphs:
+    # 4C1. Maandlasten plot, met de banden van de risicosimulatie.
+    figure_lasten = fill_line_figure("plot_verloop_lasten", hypo_verloop_table)
+
+    if simulatie:
+        figure_lasten.add_traces(simulation_traces(hypo_verloop_table["datum"], simulatie))
+
+    # 4C2. Uitstaand saldo plot.
+    figure_hypotheek = fill_line_figure("plot_verloop_hypotheek", hypo_verloop_table)
+
+    return figure_lasten, figure_hypotheek
+
+
+def simulation_traces(x, simulatie: dict) -> list[dict]:
+    # Percentielbanden en mediaan van de gesimuleerde netto maandlasten.
+    netto = dict(zip(simulatie["percentiles"], simulatie["netto"]))
+    x = np.asarray(x)
+    traces = []
+
+    for lower, upper, fillcolor in SIMULATIE_BANDEN:
+        band = {"type": "scatter", "x": x, "mode": "lines", "line": {"width": 0}}
+        traces.append({**band, "y": encode_array(netto[lower]), "showlegend": False})
+        traces.append(
+            {
+                **band,
+                "y": encode_array(netto[upper]),
+                "fill": "tonexty",
+                "fillcolor": fillcolor,
+                "name": f"netto P{lower} - P{upper}",
+            }
+        )
+
+    traces.append(
+        {
+            "type": "scatter",
+            "x": x,
+            "y": encode_array(netto[50]),
+            "mode": "lines",
+            "line": {"color": "rgb(171, 99, 250)", "dash": "dash"},
+            "name": "netto mediaan",
+        }
+    )
+
+    return traces
+
+
+def calc_vergelijk(inputs: dict, hypo_verloop_table: pd.DataFrame) -> go.Figure:
     # 4B. Definitie voorstel-vergelijkings-tabel.
     # Ingepast in de maximale looptijd van 30 jaren.
-    perioden_n_max_range = np.arange(0, 12 * looptijd_max_jaren, 1)
-    perioden_m_max_range = pd.bdate_range(
-        start=today, periods=12 * looptijd_max_jaren, freq="MS"
-    ).to_pydatetime()
+    perioden_m_max_range = get_calendar(inputs["today"])["perioden_m"]
+    netto = np.array(hypo_verloop_table["netto"])
+    hold_netto_maandlast = np.array(inputs["hold_netto_maandlast"])
 
     if hold_netto_maandlast.size > 1:
         netto_hold = hold_netto_maandlast
     else:
         netto_hold = netto
 
-    netto_base_plot, netto_hold_plot = [np.zeros(12 * looptijd_max_jaren) for _ in range(2)]
+    netto_base_plot, netto_hold_plot = [np.zeros(12 * LOOPTIJD_MAX_JAREN) for _ in range(2)]
     netto_base_plot[0 : len(netto)] = netto
     netto_hold_plot[0 : len(netto_hold)] = netto_hold
-    hypo_lasten_vergelijk_table = pd.DataFrame(
-        list(zip(perioden_n_max_range, perioden_m_max_range, netto_base_plot, netto_hold_plot)),
-        columns=["id", "datum", "huidig", "bewaard"],
-    )
 
-    # 4C. Updaten van result graphs:
-    # 4C1. Maandlasten plot.
-    plot_verloop_lasten.figure = px.scatter(
-        hypo_verloop_table,
-        x="datum",
-        y=["rente", "aflossing", "bruto", "netto"],
-        title="Maandlasten",
+    # 4C4. Maandlasten vergelijk: vorige status versus huidig.
+    return fill_line_figure(
+        "plot_lastenvergelijk",
+        {"datum": perioden_m_max_range, "huidig": netto_base_plot, "bewaard": netto_hold_plot},
     )
-    plot_verloop_lasten.figure.update_layout(yaxis_tickprefix="€", yaxis_title="Euro")
 
-    # 4C2. Uitstaand saldo plot.
-    plot_verloop_hypotheek.figure = px.scatter(
-        hypo_verloop_table, x="datum", y=["saldo", "woz"], title="Uitstaand saldo en WOZ waarde"
-    )
-    plot_verloop_hypotheek.figure.update_layout(yaxis_tickprefix="€", yaxis_title="Euro")
 
+def calc_verdeling(
+    inputs: dict, hypotheek: dict, verloop: dict, hypo_verloop_table: pd.DataFrame
+) -> go.Figure:
     # 4C3. Sunburst plot van kostenverdeling.
-    # Create subplots: use "domain" type for Pie subplot.
-    plot_kostenverdeling.figure = make_subplots(rows=1, cols=1, specs=[[{"type": "domain"}]])
-    plot_kostenverdeling.figure.add_trace(
-        go.Sunburst(
-            labels=[
-                "Verdeling",
-                "Rente",
-                "Aflossing",
-                "Fiscaal",
-                "Aflosvrij",
-                "Lineair ",
-                "Annuitair ",
-                "Lineair",
-                "Annuitair",
-                "VT [ontvangen]",
-                "EW forfait [betalen]",
-            ],
-            parents=[
-                "",
-                "Verdeling",
-                "Verdeling",
-                "Verdeling",
-                "Rente",
-                "Rente",
-                "Rente",
-                "Aflossing",
-                "Aflossing",
-                "Fiscaal",
-                "Fiscaal",
-            ],
-            values=[
-                np.round(hypo_verloop_table["bruto"][period_select]),
-                np.round(rente[period_select]),
-                np.round(aflossing_annuitair[period_select] + aflossing_lineair[period_select]),
-                np.round(fiscaal_vt[period_select] + fiscaal_ew[period_select]),
-                np.round(hypo_niet_aflossend * im),
-                np.round(hypo_saldo_aflossend_lin[period_select] * im),
-                np.round(hypo_saldo_aflossend_ann[period_select] * im),
-                np.round(aflossing_lineair[period_select]),
-                np.round(aflossing_annuitair[period_select]),
-                np.round(fiscaal_vt[period_select]),
-                np.round(fiscaal_ew[period_select]),
-            ],
-        ),
-        1,
-        1,
-    )
-    plot_kostenverdeling.figure.update_layout(
-        yaxis_tickprefix="€", title_text="Maandlasten verdeling"
-    )
+    period_select = inputs["periode_selector"] - 1
+    im = verloop["im"]
+    aflossing_annuitair = verloop["aflossing_annuitair"]
+    aflossing_lineair = verloop["aflossing_lineair"]
+    fiscaal_vt = hypo_verloop_table["vt"]
+    fiscaal_ew = hypo_verloop_table["ew"]
+
+    values = [
+        np.round(hypo_verloop_table["bruto"][period_select]),
+        np.round(verloop["rente"][period_select]),
+        np.round(aflossing_annuitair[period_select] + aflossing_lineair[period_select]),
+        np.round(fiscaal_vt[period_select] + fiscaal_ew[period_select]),
+        np.round(hypotheek["hypo_niet_aflossend"] * im),
+        np.round(verloop["hypo_saldo_aflossend_lin"][period_select] * im),
+        np.round(verloop["hypo_saldo_aflossend_ann"][period_select] * im),
+        np.round(aflossing_lineair[period_select]),
+        np.round(aflossing_annuitair[period_select]),
+        np.round(fiscaal_vt[period_select]),
+        np.round(fiscaal_ew[period_select]),
+    ]
 
-    # 4C4. Maandlasten vergelijk: vorige status versus huidig.
-    plot_lastenvergelijk.figure = px.scatter(
-        hypo_lasten_vergelijk_table,
-        x="datum",
-        y=["bewaard", "huidig"],
-        title="Voorstel vergelijker",
-    )
-    plot_lastenvergelijk.figure.update_layout(yaxis_tickprefix="€", yaxis_title="Euro")
+    return fill_figure("plot_kostenverdeling", [{"values": values}])
 
-    # 5. Updaten van output sections en weergave prep:
-    # 5A. Update plots.
-    payload, _ = utils.setSubmissionData(payload, "plot_verloop_lasten", plot_verloop_lasten)
-    payload, _ = utils.setSubmissionData(payload, "plot_verloop_hypotheek", plot_verloop_hypotheek)
-    payload, _ = utils.setSubmissionData(payload, "plot_kostenverdeling", plot_kostenverdeling)
-    payload, _ = utils.setSubmissionData(payload, "plot_lastenvergelijk", plot_lastenvergelijk)
 
-    # 5B. Update numerical outputs. Format and update hypotheek verloop table (reporting).
-    payload, _ = utils.setSubmissionData(payload, "hypo_verloop_table", hypo_verloop_table)
-    payload, _ = utils.setSubmissionData(payload, "hypo_benodigd", hypo_benodigd)
-    payload, _ = utils.setSubmissionData(payload, "overdrachtsbelasting", overdrachtsbelasting)
-    payload, _ = utils.setSubmissionData(payload, "kosten_nhg", kosten_nhg)
-    payload, _ = utils.setSubmissionData(payload, "brutolast", sum(hypo_verloop_table["bruto"]))
-    payload, _ = utils.setSubmissionData(payload, "nettolast", sum(hypo_verloop_table["netto"]))
+def calc_rapport(_inputs: dict, hypo_verloop_table: pd.DataFrame) -> dict:
+    # Create monthly report table, with a hash of the hypotheek verloop to determine whether the
+    # page shown in the form is still up-to-date.
+    schedule_hash = hashlib.sha1(
+        pd.util.hash_pandas_object(hypo_verloop_table, index=False).to_numpy().tobytes()
+    ).hexdigest()
 
-    # Create monthly report table.
-    hypo_verloop_table_report = prep_report_table(
-        hypo_verloop_table, ["saldo", "woz", "rente", "aflossing", "vt", "ew", "bruto", "netto"]
-    )
+    return {
+        "tabel": prep_report_table(hypo_verloop_table, REPORT_EURO_COLUMNS),
+        "hash": schedule_hash,
+    }
 
-    payload, _ = utils.setSubmissionData(
-        payload, "hypo_verloop_table_report", hypo_verloop_table_report
-    )
 
-    return payload
+def show_report_page(meta_data: dict, payload: dict) -> dict:
+    # Show the page of the selected year of the last calculated report. Calculate it when there is
+    # no report yet.
+    stage_cache, is_found = utils.getCache(meta_data, "calc_stages")
 
+    if not is_found or "rapport" not in stage_cache:
+        return calc_update(meta_data, payload)
 
-def prep_report_table(results_table, format_col_names) -> component.DataTables:
-    # Prep formatting of reporting table.
-    def format_report_col(x):
-        return "€ {:.2f}".format(x)
+    return set_report_page(payload, stage_cache["rapport"][1])
 
-    report_table = copy.deepcopy(results_table)
 
-    # Tweak formatting of selected columns.
-    for name in format_col_names:
-        report_table[name] = np.round(results_table[name]).apply(format_report_col)
+def set_report_page(payload: dict, rapport: dict) -> dict:
+    # Put the page of the selected year in the report table. The page is only sent when the form
+    # shows another page, or a page of another hypotheek verloop.
+    rapport_tabel = rapport["tabel"]
+    aantal_jaren = -(-len(rapport_tabel) // RAPPORT_PAGINA_MAANDEN)
+    rapport_jaar, _ = utils.getSubmissionData(payload, key="rapport_jaar")
+    rapport_jaar = int(rapport_jaar or 1)
 
-    return report_table
+    if rapport_jaar > aantal_jaren:
+        # De selector overschrijdt de looptijd - breng terug naar laatste jaar.
+        rapport_jaar = aantal_jaren
+        payload, _ = utils.setSubmissionData(payload, "rapport_jaar", rapport_jaar)
 
+    page_hash = f"{rapport['hash']}:{rapport_jaar}"
+    shown_hash, _ = utils.getSubmissionData(payload, key="hypo_verloop_table_report_hash")
 
-def capture_hold_scenario(meta_data: dict, payload: dict) -> dict:
-    # Store the current submission data as "hold scenario".
-    # Define and capture "hold" maandlasten array.
-    hypo_verloop_table, _ = utils.getSubmissionData(payload, key="hypo_verloop_table")
+    if page_hash != shown_hash:
+        start = (rapport_jaar - 1) * RAPPORT_PAGINA_MAANDEN
+        payload, _ = utils.setSubmissionData(
+            payload,
+            "hypo_verloop_table_report",
+            rapport_tabel.iloc[start : start + RAPPORT_PAGINA_MAANDEN],
+        )
+        payload, _ = utils.setSubmissionData(payload, "hypo_verloop_table_report_hash", page_hash)
 
-    if hypo_verloop_table:
-        hypo_verloop_table = pd.DataFrame(hypo_verloop_table)
-        netto_maandlast = np.array(hypo_verloop_table.netto)
+    return payload
 
-        # Create a deep-copy of the submission data.
-        submission_copy = copy.deepcopy(payload["submission"])
 
-        # Propagate and invoke update().
-        payload, _ = utils.setSubmissionData(payload, "hold_submission_data", submission_copy)
-        payload, _ = utils.setSubmissionData(payload, "hold_netto_maandlast", netto_maandlast)
-        payload = calc_update(meta_data, payload)
+def prep_report_table(results_table, format_col_names) -> pd.DataFrame:
+    # Prep formatting of reporting table. Round all selected columns at once, and format them as
+    # euros with string operations on the whole block. The rounded values are whole euros.
+    rounded = np.round(results_table[format_col_names].to_numpy(dtype=float)).astype(np.int64)
+    formatted = np.char.add(np.char.add("€ ", rounded.astype(str)), ".00")
 
-    return payload
+    return pd.DataFrame({**results_table, **dict(zip(format_col_names, formatted.T))})
+
+
+def capture_hold_scenario(meta_data: dict, payload: dict) -> dict:
+    # Store the inputs and netto maandlast of the current scenario as new "hold scenario" in the
+    # session. Only the scenario IDs are sent to the form.
+    inputs, payload = get_inputs(meta_data, payload)
+    netto_maandlast = run_stages(meta_data, inputs)["tabel"]["netto"].to_numpy()
+
+    hold_scenarios = _get_hold_scenarios(meta_data)
+    scenario_id = next(
+        f"Voorstel {nr}" for nr in itertools.count(1) if f"Voorstel {nr}" not in hold_scenarios
+    )
+    hold_scenarios[scenario_id] = {
+        "inputs": {key: inputs[key] for key in INPUT_KEYS},
+        "netto": netto_maandlast,
+    }
+
+    # Select the new scenario and invoke update().
+    payload = _set_hold_scenarios(meta_data, payload, hold_scenarios, scenario_id)
+
+    return calc_update(meta_data, payload)
 
 
 def restore_hold_scenario(meta_data: dict, payload: dict) -> dict:
-    # Fetch stored payload and restore hold-scenario data.
-    hold_submission_data, _ = utils.getSubmissionData(payload, key="hold_submission_data")
+    # Restore the inputs of the selected hold-scenario and invoke update().
+    hold_scenario = _get_hold_scenario(meta_data, payload)
+
+    if hold_scenario:
+        for key, value in hold_scenario["inputs"].items():
+            payload, _ = utils.setSubmissionData(payload, key, value)
 
-    if hold_submission_data:
-        # Call update method and re-invoke hold().
-        payload["submission"] = hold_submission_data
-        payload = capture_hold_scenario(meta_data, payload)
+        payload = calc_update(meta_data, payload)
 
     return payload
 
 
 def clear_hold_scenario(meta_data: dict, payload: dict) -> dict:
-    # Clear the stored "hold" submission data and netto maandlast. Invoke update().
-    hold_submission_data, _ = utils.getSubmissionData(payload, key="hold_submission_data")
-
-    if hold_submission_data:
-        payload, _ = utils.setSubmissionData(payload, "hold_submission_data", [])
-        payload, _ = utils.setSubmissionData(payload, "hold_netto_maandlast", np.array([]))
+    # Remove the selected hold-scenario and select the most recent remaining one. Invoke update().
+    scenario_id, _ = utils.getSubmissionData(payload, key="hold_scenario")
+    hold_scenarios = _get_hold_scenarios(meta_data)
+
+    if scenario_id in hold_scenarios:
+        del hold_scenarios[scenario_id]
+        payload = _set_hold_scenarios(
+            meta_data, payload, hold_scenarios, next(reversed(hold_scenarios), "")
+        )
         payload = calc_update(meta_data, payload)
 
     return payload
+
+
+def _get_hold_scenarios(meta_data: dict) -> dict:
+    # The hold-scenarios of the session: inputs and netto maandlast per scenario ID.
+    hold_scenarios, is_found = utils.getCache(meta_data, "hold_scenarios")
+    if not is_found:
+        hold_scenarios = {}
+
+    return hold_scenarios
+
+
+def _get_hold_scenario(meta_data: dict, payload: dict) -> dict | None:
+    # The hold-scenario that is selected in the form, if any.
+    scenario_id, _ = utils.getSubmissionData(payload, key="hold_scenario")
+
+    return _get_hold_scenarios(meta_data).get(scenario_id) if scenario_id else None
+
+
+def _set_hold_scenarios(
+    meta_data: dict, payload: dict, hold_scenarios: dict, selected: str
+) -> dict:
+    # Store the hold-scenarios in the session and put their IDs and the selected ID in the form.
+    utils.setCache(meta_data, "hold_scenarios", hold_scenarios)
+    payload, _ = utils.setSubmissionData(payload, "hold_scenarios", list(hold_scenarios))
+    payload, _ = utils.setSubmissionData(payload, "hold_scenario", selected)
+
+    return payload
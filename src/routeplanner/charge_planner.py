@@ -0,0 +1,277 @@
+"""Planning of charge stops along a route.
+
+Charge stops are planned along the actual route geometry. Candidate stops are the charging stations
+of a local dataset within a detour distance of the route, or (without dataset) the points of the
+route itself. The stations near the route are found with a spatial grid index.
+
+Stops are planned greedily: each stop is the candidate that can be reached with the remaining range,
+including the detour to the station, and after which the truck gets farthest along the route,
+including the detour back. This gives the least number of stops. The planning is vectorized over
+the ranges, such that the stops of all trucks are planned in one pass.
+
+The charging station dataset is a CSV file with (at least) "lon" and "lat" columns [degrees], and
+optionally a "name" column.
+"""
+
+import functools
+import os
+
+import numpy as np
+import pandas as pd
+
+from routeplanner.geometry import EARTH_RADIUS, haversine, route_distance
+
+# Maximum distance of a charging station to the route [m].
+MAX_DETOUR = 5000
+
+# Spacing of the route points matched to charging stations [m].
+SAMPLE_SPACING = 500
+
+
+class StationIndex:
+    """Spatial grid index of charging stations."""
+
+    def __init__(self, lon, lat, cell_size: float = MAX_DETOUR):
+        """Create the index.
+
+        Args:
+            lon:        Longitudes of the stations [degrees].
+            lat:        Latitudes of the stations [degrees].
+            cell_size:  Size of the grid cells [m]. Queries find all stations within this distance.
+        """
+        self.lon = np.asarray(lon, dtype=float)
+        self.lat = np.asarray(lat, dtype=float)
+        self.cell_size = cell_size
+
+        # Sort the stations by grid cell, such that the stations of a cell are a contiguous range.
+        self._cells = self._cell_keys(self.lon, self.lat)
+        self._order = np.argsort(self._cells, kind="stable")
+        self._cells = self._cells[self._order]
+
+    def _cell_keys(self, lon, lat) -> np.ndarray:
+        """Grid cell of each position, as a single integer key."""
+        ix, iy = self._cell_indices(lon, lat)
+        return ix * (1 << 32) + iy
+
+    def _cell_indices(self, lon, lat) -> tuple[np.ndarray, np.ndarray]:
+        """Grid cell column and row of each position."""
+        # Cells are the cell size in degrees of latitude. Away from the equator they are narrower
+        # than the cell size, which queries compensate for with extra cells in the lon direction.
+        scale = np.radians(EARTH_RADIUS) / self.cell_size
+        ix = np.floor(np.asarray(lon) * scale).astype(np.int64)
+        iy = np.floor(np.asarray(lat) * scale).astype(np.int64)
+
+        return ix, iy
+
+    def nearest_points(self, lon, lat, max_distance: float) -> tuple[np.ndarray, np.ndarray]:
+        """Find the point of a polyline nearest to each station within a distance.
+
+        Args:
+            lon:            Longitudes of the points [degrees]. Points must be closer together than
+                the cell size to find all stations.
+            lat:            Latitudes of the points [degrees].
+            max_distance:   Maximum distance of the stations to the points [m], at most the cell
+                size.
+
+        Returns:
+            stations:       Indices of the stations within the distance of a point.
+            points:         Index of the nearest point of each of these stations.
+        """
+        lon = np.asarray(lon, dtype=float)
+        lat = np.asarray(lat, dtype=float)
+        ix, iy = self._cell_indices(lon, lat)
+
+        # Candidate (point, station) pairs from the cells around each point: one cell up and down,
+        # and as many cells left and right as needed to cover the cell size at the latitude.
+        n_x = int(np.ceil(1 / np.cos(np.radians(min(np.abs(lat).max(), 85)))))
+        offsets = [(dx, dy) for dx in range(-n_x, n_x + 1) for dy in (-1, 0, 1)]
+        keys = np.concatenate([(ix + dx) * (1 << 32) + iy + dy for dx, dy in offsets])
+        points = np.tile(np.arange(len(lon)), len(offsets))
+
+        # Stations of each cell, from the range of the cell in the sorted cell keys.
+        start = np.searchsorted(self._cells, keys, side="left")
+        count = np.searchsorted(self._cells, keys, side="right") - start
+        offset = np.repeat(start - np.cumsum(count) + count, count)
+        stations = self._order[offset + np.arange(count.sum())]
+        points = np.repeat(points, count)
+
+        distance = haversine(lon[points], lat[points], self.lon[stations], self.lat[stations])
+        within = distance <= max_distance
+        stations, points, distance = stations[within], points[within], distance[within]
+
+        # Nearest point per station.
+        order = np.lexsort((distance, stations))
+        stations, points = stations[order], points[order]
+        first = np.r_[True, stations[1:] != stations[:-1]]
+
+        return stations[first], points[first]
+
+
+def load_stations(stations_file: str) -> tuple[pd.DataFrame, StationIndex]:
+    """Load and index the charging stations, reusing them until the file changes."""
+    return _read_stations(stations_file, os.stat(stations_file).st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=2)
+def _read_stations(stations_file: str, _mtime: int) -> tuple[pd.DataFrame, StationIndex]:
+    """Read the charging stations and index them. Cached per modification time."""
+    stations = pd.read_csv(stations_file)
+
+    if "name" not in stations:
+        stations["name"] = "Charging station"
+
+    return stations, StationIndex(stations["lon"], stations["lat"])
+
+
+def plan_route(coordinates, ranges, way_points: list, stations_file: str | None = None) -> dict:
+    """Plan the charge stops along a route for a number of ranges.
+
+    Args:
+        coordinates:    [lon, lat] coordinates of the route points [degrees].
+        ranges:         Ranges of the trucks [m].
+        way_points:     Indices of the route points of the waypoints.
+        stations_file:  CSV file with the charging stations. Defaults to None, in which case the
+            route points are the candidate stops.
+
+    Returns:
+        plan:           The plan of `plan_charge_stops`, with in addition:
+            waypoint_stops: Number of stops before reaching each waypoint, for each range.
+            candidates:     The candidate stops, see `candidate_stops`.
+            length:         Length of the route [m].
+    """
+    coordinates = np.asarray(coordinates, dtype=float)
+    lon, lat = coordinates[:, 0], coordinates[:, 1]
+    distance = route_distance(lon, lat)
+
+    candidates = candidate_stops(lon, lat, distance, stations_file)
+    plan = plan_charge_stops(distance[-1], ranges, candidates)
+
+    stop_distance = np.full(plan["stops"].shape, np.inf)
+    is_stop = plan["stops"] >= 0
+    stop_distance[is_stop] = candidates["distance"][plan["stops"][is_stop]]
+    waypoint_distance = distance[np.asarray(way_points, dtype=int)]
+    plan["waypoint_stops"] = (stop_distance[:, None, :] <= waypoint_distance[:, None]).sum(axis=2)
+    plan["candidates"] = candidates
+    plan["length"] = distance[-1]
+
+    return plan
+
+
+def candidate_stops(lon, lat, distance, stations_file: str | None = None) -> dict:
+    """Candidate charge stops along the route.
+
+    Args:
+        lon:            Longitudes of the route points [degrees].
+        lat:            Latitudes of the route points [degrees].
+        distance:       Distance along the route of the route points [m].
+        stations_file:  CSV file with the charging stations. Defaults to None, in which case the
+            route points are the candidates.
+
+    Returns:
+        candidates:     Position along the route [m], detour to and from the route [m], lon, lat
+            and name of the candidate stops, sorted by position along the route.
+    """
+    if stations_file is None:
+        return {
+            "distance": distance,
+            "detour": np.zeros(len(lon)),
+            "lon": lon,
+            "lat": lat,
+            "name": np.full(len(lon), "Charge stop", dtype=object),
+        }
+
+    stations, index = load_stations(stations_file)
+
+    # Stations are matched to points sampled along the route at a fixed spacing, which are close
+    # enough together for the index and limit the detour error to half the spacing.
+    sub_distance = np.r_[np.arange(0, distance[-1], SAMPLE_SPACING), distance[-1]]
+    sub_lon = np.interp(sub_distance, distance, lon)
+    sub_lat = np.interp(sub_distance, distance, lat)
+
+    idx, points = index.nearest_points(sub_lon, sub_lat, MAX_DETOUR)
+    detour = 2 * haversine(sub_lon[points], sub_lat[points], index.lon[idx], index.lat[idx])
+    order = np.argsort(sub_distance[points], kind="stable")
+
+    return {
+        "distance": sub_distance[points][order],
+        "detour": detour[order],
+        "lon": index.lon[idx][order],
+        "lat": index.lat[idx][order],
+        "name": stations["name"].to_numpy()[idx][order],
+    }
+
+
+def plan_charge_stops(route_length: float, ranges, candidates: dict) -> dict:
+    """Plan the charge stops along the route for a number of ranges.
+
+    Each truck starts fully charged and charges fully at each stop.
+
+    Args:
+        route_length:   Length of the route [m].
+        ranges:         Ranges of the trucks [m].
+        candidates:     Candidate charge stops, see `candidate_stops`.
+
+    Returns:
+        plan:           Dict with for each range:
+            stops:          Indices of the candidates used as stops, padded with -1.
+            n_stops:        Number of stops.
+            feasible:       Whether the end of the route can be reached.
+    """
+    ranges = np.atleast_1d(np.asarray(ranges, dtype=float))
+    distance = candidates["distance"]
+    detour = candidates["detour"]
+
+    # A candidate can be reached when its position plus half the detour is within range. After
+    # charging, the truck can get its range beyond its position minus half the detour. Sort the
+    # candidates by reach, such that the reachable candidates are a prefix, and keep the one with
+    # the farthest restart for each prefix, for all ranges alike.
+    reach = distance + detour / 2
+    restart = distance - detour / 2
+    order = np.argsort(reach, kind="stable")
+    reach = reach[order]
+    best = order[_argmax_accumulate(restart[order])]
+
+    # Restart of the last stop of each truck, the start of the route before the first stop.
+    position = np.zeros(len(ranges))
+    limit = ranges.copy()
+    feasible = np.ones(len(ranges), dtype=bool)
+    stops = []
+
+    while True:
+        # Trucks that cannot reach the end of the route with their current charge.
+        active = feasible & (limit < route_length)
+
+        if not active.any():
+            break
+
+        if len(reach) == 0:
+            feasible[active] = False
+            break
+
+        n_reachable = np.searchsorted(reach, limit[active], side="right")
+        stop = np.where(n_reachable > 0, best[np.maximum(n_reachable, 1) - 1], -1)
+        progress = (stop >= 0) & (restart[stop] > position[active])
+
+        # Trucks that cannot get any further are stuck.
+        active_idx = np.flatnonzero(active)
+        feasible[active_idx[~progress]] = False
+        moving = active_idx[progress]
+        stop = stop[progress]
+
+        position[moving] = restart[stop]
+        limit[moving] = restart[stop] + ranges[moving]
+
+        stops_round = np.full(len(ranges), -1)
+        stops_round[moving] = stop
+        stops.append(stops_round)
+
+    stops = np.array(stops).T if stops else np.zeros((len(ranges), 0), dtype=int)
+
+    return {"stops": stops, "n_stops": (stops >= 0).sum(axis=1), "feasible": feasible}
+
+
+def _argmax_accumulate(values: np.ndarray) -> np.ndarray:
+    """Index of the maximum value of each prefix of the values, the first one in case of ties."""
+    previous_max = np.r_[-np.inf, np.maximum.accumulate(values)[:-1]]
+    is_max = values > previous_max
+    return np.maximum.accumulate(np.where(is_max, np.arange(len(values)), 0))
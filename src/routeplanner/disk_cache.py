@@ -0,0 +1,108 @@
+"""Persistent cache of JSON results in an SQLite database.
+
+The database is shared by all sessions and processes of the route planner, such that results of
+web service calls (e.g. here.com lookups) are reused by later sessions. Each cache is a table in
+the database, with the results stored as JSON text with the time they were stored. Results that
+are older than the time-to-live of the cache are ignored and replaced when stored again.
+
+Failures to read or write the database are logged and otherwise ignored, such that the route
+planner keeps working (without cache) when the database is not available.
+"""
+
+import contextlib
+import json
+import logging
+import re
+import sqlite3
+import tempfile
+import time
+from os import path
+
+CACHE_FILE = path.join(tempfile.gettempdir(), "route_planner_cache.sqlite")
+TIMEOUT = 10
+
+
+class DiskCache:
+    """Table with JSON results by key in an SQLite database."""
+
+    def __init__(self, table: str, ttl: float, file: str = CACHE_FILE):
+        """Create the cache.
+
+        Args:
+            table:      Name of the table of the cache.
+            ttl:        Time-to-live of the results in seconds.
+            file:       Path of the database file. Defaults to a file in the temp folder.
+        """
+        if not re.fullmatch(r"[a-z_]+", table):
+            raise ValueError(f"Invalid cache table name '{table}'.")
+
+        self.table = table
+        self.ttl = ttl
+        self.file = file
+
+        try:
+            with self._connect() as connection:
+                connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} "
+                    "(key TEXT PRIMARY KEY, result TEXT NOT NULL, stored REAL NOT NULL)"
+                )
+        except sqlite3.Error as exc:
+            logging.warning("Cache '%s' in '%s' not available: %s", table, file, exc)
+
+    def get_many(self, keys: list[str]) -> dict:
+        """Get the stored results that have not expired.
+
+        Args:
+            keys:       Keys of the results.
+
+        Returns:
+            results:    Dict with the results by key. Keys without (valid) result are omitted.
+        """
+        keys = list(dict.fromkeys(keys))
+
+        if not keys:
+            return {}
+
+        try:
+            with self._connect() as connection:
+                rows = connection.execute(
+                    f"SELECT key, result FROM {self.table} "
+                    f"WHERE stored >= ? AND key IN ({', '.join('?' * len(keys))})",
+                    [time.time() - self.ttl, *keys],
+                ).fetchall()
+        except sqlite3.Error as exc:
+            logging.warning("Reading cache '%s' failed: %s", self.table, exc)
+            return {}
+
+        return {key: json.loads(result) for key, result in rows}
+
+    def put_many(self, results: dict) -> None:
+        """Store results, replacing earlier results with the same keys.
+
+        Args:
+            results:    Dict with JSON-serializable results by key.
+        """
+        if not results:
+            return
+
+        stored = time.time()
+
+        try:
+            with self._connect() as connection:
+                connection.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (key, result, stored) VALUES (?, ?, ?)",
+                    [(key, json.dumps(result), stored) for key, result in results.items()],
+                )
+        except sqlite3.Error as exc:
+            logging.warning("Writing cache '%s' failed: %s", self.table, exc)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Open a connection to the database in a transaction, and close it afterwards."""
+        connection = sqlite3.connect(self.file, timeout=TIMEOUT)
+
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
@@ -0,0 +1,99 @@
+"""Comparison of all trucks on a route.
+
+The trucks are kept in a columnar table (one column per property, one row per truck), such that
+the charge stops, energy use and travel time of all trucks are computed in one vectorized pass
+over the table, using the charge stop plan of the route for the ranges of all trucks.
+
+The estimates are deliberately simple: the energy use follows from the battery capacity and the
+official range, trucks drive at their eco speed (or top speed when not set), and charge the energy
+used beyond their battery capacity at their DC (or else AC) charging power.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Time lost per charge stop for the detour, parking and connecting [h].
+STOP_OVERHEAD = 0.25
+
+# Columns of the comparison table: column ID and name. The (hidden) id is the truck index.
+COMPARISON_COLUMNS = [
+    ["id", "Id"],
+    ["label", "Truck"],
+    ["range", "Range (km)"],
+    ["charge_stops", "Charges (#)"],
+    ["energy", "Energy (kWh)"],
+    ["driving_time", "Driving (h)"],
+    ["charging_time", "Charging (h)"],
+    ["total_time", "Total (h)"],
+    ["feasible", "Feasible"],
+]
+
+
+def truck_table(vehicles: list) -> pd.DataFrame:
+    """Columnar table of the truck properties used in the comparison.
+
+    Args:
+        vehicles:   Preprocessed truck catalogue, in the order of the truck indices.
+
+    Returns:
+        table:      Table with the label, range [km], battery capacity [kWh], charging power [kW]
+            and speed [km/h] of the trucks.
+    """
+    drive_train = pd.DataFrame([vehicle["driveTrain"] for vehicle in vehicles])
+
+    # Fall back to AC charging and the top speed for trucks without DC charging or eco speed.
+    dc_charging = drive_train["dcCharging"]
+    charging = dc_charging.where(dc_charging > 0, drive_train["acCharging"])
+    speed = drive_train["ecoSpeed"].where(drive_train["ecoSpeed"] > 0, drive_train["maxSpeed"])
+
+    return pd.DataFrame(
+        {
+            "label": [vehicle["label"] for vehicle in vehicles],
+            "range": drive_train["officialRange"].astype(float),
+            "battery": drive_train["totalBatteryCapacity"].astype(float),
+            "charging": charging.astype(float),
+            "speed": speed.astype(float),
+        }
+    )
+
+
+def compare_trucks(table: pd.DataFrame, plan: dict) -> pd.DataFrame:
+    """Compare all trucks on a route.
+
+    Args:
+        table:      Truck table, see `truck_table`.
+        plan:       Charge stop plan of the route for the ranges of all trucks in the table, see
+            `charge_planner.plan_route`.
+
+    Returns:
+        comparison: Table with the charge stops, energy use [kWh] and driving, charging and total
+            time [h] of each truck, the trucks that can complete the route first and then sorted by
+            total time.
+    """
+    length = plan["length"] / 1000
+    energy = table["battery"] / table["range"] * length
+
+    driving_time = length / table["speed"]
+    charging_power = table["charging"].where(table["charging"] > 0)
+    charging_time = (
+        np.maximum(energy - table["battery"], 0) / charging_power
+        + plan["n_stops"] * STOP_OVERHEAD
+    )
+
+    comparison = pd.DataFrame(
+        {
+            "id": table.index,
+            "label": table["label"],
+            "range": table["range"],
+            "charge_stops": plan["n_stops"],
+            "energy": energy.round(1),
+            "driving_time": driving_time.round(2),
+            "charging_time": charging_time.round(2),
+            "total_time": (driving_time + charging_time).round(2),
+            "feasible": np.where(plan["feasible"], "Yes", "No"),
+        }
+    )
+
+    return comparison.sort_values(
+        ["feasible", "total_time"], ascending=[False, True], na_position="last", kind="stable"
+    )
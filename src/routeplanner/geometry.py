@@ -0,0 +1,118 @@
+"""Route geometry: distances along routes and simplification of routes for display on the map.
+
+Routes from openrouteservice can have tens of thousands of points, far more than can be seen on the
+map at the zoom level the route is shown. Routes are simplified with the Douglas-Peucker algorithm
+in Web Mercator coordinates (as used by the map), with a tolerance of a fraction of a pixel at the
+zoom level of the map. The full route is kept server side, only the plotted line is simplified.
+"""
+
+import numpy as np
+
+# Mean radius of the earth [m].
+EARTH_RADIUS = 6371008.8
+
+# Size of the map tiles in pixels, and the tolerance of the simplified route in pixels.
+TILE_SIZE = 512
+TOLERANCE_PIXELS = 0.5
+
+# Zoom levels the map can be zoomed in beyond the initial zoom level before the simplification
+# becomes visible.
+ZOOM_MARGIN = 2
+
+
+def haversine(lon1, lat1, lon2, lat2):
+    """Great-circle distance between positions [m], for scalars or arrays of positions [degrees]."""
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def route_distance(lon, lat) -> np.ndarray:
+    """Cumulative distance along a route [m] at each of its points [degrees]."""
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+
+    return np.r_[0.0, np.cumsum(haversine(lon[:-1], lat[:-1], lon[1:], lat[1:]))]
+
+
+def mercator(lon, lat) -> tuple[np.ndarray, np.ndarray]:
+    """Project lon and lat [degrees] to Web Mercator coordinates, scaled to degrees of longitude."""
+    lat = np.clip(np.asarray(lat, dtype=float), -85.05, 85.05)
+    y = np.degrees(np.log(np.tan(np.pi / 4 + np.radians(lat) / 2)))
+
+    return np.asarray(lon, dtype=float), y
+
+
+def zoom_tolerance(zoom: float) -> float:
+    """Tolerance of the simplified route for the zoom level, in degrees of longitude."""
+    return TOLERANCE_PIXELS * 360 / (TILE_SIZE * 2 ** (zoom + ZOOM_MARGIN))
+
+
+def simplify(x, y, tolerance: float) -> np.ndarray:
+    """Simplify a polyline with the Douglas-Peucker algorithm.
+
+    Args:
+        x:          x coordinates of the points.
+        y:          y coordinates of the points.
+        tolerance:  Maximum distance of the removed points to the simplified polyline.
+
+    Returns:
+        keep:       Boolean mask of the points of the simplified polyline.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n_points = len(x)
+    keep = np.zeros(n_points, dtype=bool)
+
+    if n_points < 3:
+        keep[:] = True
+        return keep
+
+    keep[[0, -1]] = True
+    segments = [(0, n_points - 1)]
+
+    while segments:
+        start, end = segments.pop()
+
+        if end - start < 2:
+            continue
+
+        # Distance of the intermediate points to the segment between the start and end point.
+        dx = x[end] - x[start]
+        dy = y[end] - y[start]
+        px = x[start + 1 : end] - x[start]
+        py = y[start + 1 : end] - y[start]
+        length_sq = dx * dx + dy * dy
+
+        if length_sq > 0:
+            t = np.clip((px * dx + py * dy) / length_sq, 0, 1)
+            distance_sq = (px - t * dx) ** 2 + (py - t * dy) ** 2
+        else:
+            distance_sq = px * px + py * py
+
+        idx = np.argmax(distance_sq)
+
+        if distance_sq[idx] > tolerance * tolerance:
+            split = start + 1 + idx
+            keep[split] = True
+            segments.append((start, split))
+            segments.append((split, end))
+
+    return keep
+
+
+def simplify_route(lon, lat, zoom: float) -> np.ndarray:
+    """Simplify a route for display on a map at the zoom level.
+
+    Args:
+        lon:        Longitudes of the route points [degrees].
+        lat:        Latitudes of the route points [degrees].
+        zoom:       Zoom level of the map.
+
+    Returns:
+        keep:       Boolean mask of the points of the simplified route.
+    """
+    x, y = mercator(lon, lat)
+
+    return simplify(x, y, zoom_tolerance(zoom))
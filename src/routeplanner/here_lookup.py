@@ -0,0 +1,204 @@
+"""Client for the here.com lookup API.
+
+Looks up the positions of the locations chosen in the route planner. Lookups are done
+concurrently over a pooled HTTP session. A token bucket limits the request rate to the configured
+lookup interval, and failed requests (429, 5xx and connection errors) are retried with an
+exponential backoff. Each attempt takes a token, such that retries respect the rate limit too.
+
+Lookup results are stored in a persistent cache shared by all sessions, such that locations that
+were looked up before (e.g. when recalculating a route with another truck) are not looked up again.
+"""
+
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from routeplanner.disk_cache import CACHE_FILE, DiskCache
+
+HERE_LOOKUP_URL = "https://lookup.search.hereapi.com/v1/lookup"
+HERE_HEADERS = {
+    "Accept": "application/json, application/geo+json, application/gpx+xml, img/png; charset=utf-8",
+    "Content-Type": "application/json; charset=utf-8",
+}
+
+# Concurrent lookups and retries of failed lookups.
+MAX_WORKERS = 4
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = [
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.INTERNAL_SERVER_ERROR,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+]
+TIMEOUT = 10
+
+# Time-to-live of cached lookup results.
+CACHE_TTL_DAYS = 30
+
+
+class HereLookupError(Exception):
+    """Lookup at here.com failed."""
+
+    def __init__(self, status_code: int, reason: str):
+        super().__init__(f"{status_code} - {reason}")
+        self.status_code = status_code
+        self.reason = reason
+
+
+class TokenBucket:
+    """Rate limiter that allows one request per interval, shared by all threads."""
+
+    def __init__(self, interval: float, capacity: int = 1):
+        self.interval = interval
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        if self.interval <= 0:
+            return
+
+        with self._lock:
+            # Add the tokens of the elapsed time, and wait for the next one when there are none.
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) / self.interval)
+            self._updated = now
+            wait = (1 - self._tokens) * self.interval if self._tokens < 1 else 0
+            self._tokens -= 1
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+class HereLookupClient:
+    """Look up here.com locations by their ID."""
+
+    def __init__(
+        self,
+        api_key: str,
+        interval: float = 0,
+        base_url: str = HERE_LOOKUP_URL,
+        max_workers: int = MAX_WORKERS,
+        cache: DiskCache | None = None,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self.cache = cache
+        self.rate_limiter = TokenBucket(interval)
+
+        # Reuse connections. Failed requests are retried in `lookup`, not by the adapter, such that
+        # every attempt goes through the rate limiter.
+        self.session = requests.Session()
+        self.session.headers.update(HERE_HEADERS)
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=max_workers))
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=max_workers))
+
+    def lookup(self, location_id: str) -> dict:
+        """Look up a location.
+
+        Args:
+            location_id:    here.com ID of the location.
+
+        Returns:
+            location:       The lookup result, with the title and position of the location.
+
+        Raises:
+            HereLookupError: When the lookup failed.
+            requests.RequestException: When the lookup failed without response.
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            retry = attempt < MAX_RETRIES
+            self.rate_limiter.acquire()
+
+            try:
+                response = self.session.get(
+                    self.base_url,
+                    params={"id": location_id, "apiKey": self.api_key},
+                    timeout=TIMEOUT,
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                if not retry:
+                    raise
+
+                time.sleep(_backoff(attempt))
+                continue
+
+            if response.status_code == HTTPStatus.OK:
+                return response.json()
+
+            if not retry or response.status_code not in RETRY_STATUSES:
+                raise HereLookupError(response.status_code, response.reason)
+
+            time.sleep(_backoff(attempt, response.headers.get("Retry-After")))
+
+    def lookup_all(self, location_ids: list[str]) -> list[dict]:
+        """Look up the locations concurrently.
+
+        Cached locations are not looked up again, and each location is looked up only once.
+
+        Args:
+            location_ids:   here.com IDs of the locations.
+
+        Returns:
+            locations:      The lookup results, in the order of the IDs.
+
+        Raises:
+            HereLookupError: When one of the lookups failed.
+        """
+        results = self.cache.get_many(location_ids) if self.cache is not None else {}
+        missing = [
+            location_id for location_id in dict.fromkeys(location_ids) if location_id not in results
+        ]
+
+        if len(missing) <= 1:
+            looked_up = [self.lookup(location_id) for location_id in missing]
+        else:
+            with ThreadPoolExecutor(min(self.max_workers, len(missing))) as executor:
+                looked_up = list(executor.map(self.lookup, missing))
+
+        looked_up = dict(zip(missing, looked_up))
+        results.update(looked_up)
+
+        if self.cache is not None:
+            self.cache.put_many(looked_up)
+
+        return [results[location_id] for location_id in location_ids]
+
+
+def _backoff(attempt: int, retry_after: str | None = None) -> float:
+    """Wait time before the next attempt [s], at least the Retry-After time (in seconds)."""
+    wait = BACKOFF_FACTOR * 2**attempt
+
+    if retry_after is not None and retry_after.strip().isdigit():
+        wait = max(wait, int(retry_after))
+
+    return wait
+
+
+@functools.lru_cache(maxsize=8)
+def get_client(
+    api_key: str,
+    interval: float = 0,
+    cache_file: str = CACHE_FILE,
+    cache_ttl_days: float = CACHE_TTL_DAYS,
+) -> HereLookupClient:
+    """Get the client for the API key.
+
+    The client is shared by all sessions, such that its connections and rate limit are shared too.
+    Lookup results are cached in the given database file, unless the time-to-live is 0.
+    """
+    cache = None
+    if cache_ttl_days > 0:
+        cache = DiskCache("here_lookups", cache_ttl_days * 24 * 3600, cache_file)
+
+    return HereLookupClient(api_key, interval, cache=cache)
@@ -0,0 +1,268 @@
+"""Offline routing on a precomputed road graph.
+
+Alternative to openrouteservice.org for routing without a network connection and without rate
+limits. The road graph is stored in a compressed NumPy file with the nodes and the edges in
+compressed sparse row (CSR) form:
+
+    node_lon, node_lat:     Coordinates of the nodes [degrees].
+    indptr:                 Edges of node i are indptr[i] to indptr[i + 1].
+    indices:                End node of each edge.
+    weights:                Length of each edge [m].
+
+Routes between waypoints are found with A* and are returned in the GeoJSON form of the
+openrouteservice directions API, as far as used by the route planner.
+
+A road graph can be built from a GeoJSON file with the roads as LineString features (e.g. exported
+from an OpenStreetMap extract with osmium or ogr2ogr) with:
+
+    python -m routeplanner.local_router roads.geojson road_graph.npz
+"""
+
+import argparse
+import functools
+import heapq
+import json
+import math
+from http import HTTPStatus
+
+import numpy as np
+
+from routeplanner.geometry import haversine
+from routeplanner.route_service import RouteServiceError
+
+# Decimals of the coordinates used to connect roads at shared points when building a graph.
+NODE_DECIMALS = 7
+
+
+class LocalRouteError(RouteServiceError):
+    """No route found in the road graph."""
+
+
+class RoadGraph:
+    """Road graph with the edges in CSR form."""
+
+    def __init__(self, node_lon, node_lat, indptr, indices, weights):
+        self.node_lon = np.asarray(node_lon, dtype=float)
+        self.node_lat = np.asarray(node_lat, dtype=float)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.weights = np.asarray(weights, dtype=float)
+
+        # Plain lists are much faster than arrays for element access in the search loop.
+        self._indptr = self.indptr.tolist()
+        self._indices = self.indices.tolist()
+        self._weights = self.weights.tolist()
+
+    @classmethod
+    def load(cls, file: str) -> "RoadGraph":
+        """Load a road graph saved with `save`."""
+        with np.load(file) as data:
+            return cls(
+                data["node_lon"], data["node_lat"], data["indptr"], data["indices"], data["weights"]
+            )
+
+    def save(self, file: str) -> None:
+        """Save the road graph to a compressed NumPy file."""
+        np.savez_compressed(
+            file,
+            node_lon=self.node_lon,
+            node_lat=self.node_lat,
+            indptr=self.indptr,
+            indices=self.indices,
+            weights=self.weights,
+        )
+
+    @classmethod
+    def from_edges(cls, node_lon, node_lat, start, end, oneway=None) -> "RoadGraph":
+        """Create a road graph from its edges, with the great-circle distance as edge length.
+
+        Args:
+            node_lon:   Longitudes of the nodes [degrees].
+            node_lat:   Latitudes of the nodes [degrees].
+            start:      Start node of each edge.
+            end:        End node of each edge.
+            oneway:     Whether each edge can only be traveled from start to end. Defaults to None
+                (all edges in both directions).
+
+        Returns:
+            graph:      The road graph.
+        """
+        node_lon = np.asarray(node_lon, dtype=float)
+        node_lat = np.asarray(node_lat, dtype=float)
+        start = np.asarray(start, dtype=np.int64)
+        end = np.asarray(end, dtype=np.int64)
+        oneway = np.zeros(len(start), dtype=bool) if oneway is None else np.asarray(oneway, bool)
+
+        # Add the reverse of the two-way edges, and sort all edges by start node.
+        start, end = np.r_[start, end[~oneway]], np.r_[end, start[~oneway]]
+        weights = haversine(node_lon[start], node_lat[start], node_lon[end], node_lat[end])
+        order = np.argsort(start, kind="stable")
+        indptr = np.r_[0, np.cumsum(np.bincount(start, minlength=len(node_lon)))]
+
+        return cls(node_lon, node_lat, indptr, end[order], weights[order])
+
+    @classmethod
+    def from_geojson(cls, file: str) -> "RoadGraph":
+        """Create a road graph from a GeoJSON file with the roads as (Multi)LineString features.
+
+        Roads are connected at points with the same coordinates. Features with a truthy "oneway"
+        property can only be traveled in the direction of their coordinates.
+        """
+        with open(file) as f:
+            features = json.load(f)["features"]
+
+        lines = []
+        for feature in features:
+            geometry = feature.get("geometry") or {}
+            oneway = (feature.get("properties") or {}).get("oneway") in (True, 1, "yes", "1")
+
+            if geometry.get("type") == "LineString":
+                lines.append((geometry["coordinates"], oneway))
+            elif geometry.get("type") == "MultiLineString":
+                lines.extend((coordinates, oneway) for coordinates in geometry["coordinates"])
+
+        lines = [(np.asarray(coordinates)[:, :2], oneway) for coordinates, oneway in lines]
+        lines = [(coordinates, oneway) for coordinates, oneway in lines if len(coordinates) > 1]
+        points = np.round(np.concatenate([coordinates for coordinates, _ in lines]), NODE_DECIMALS)
+        nodes, node_idx = np.unique(points, axis=0, return_inverse=True)
+        node_idx = node_idx.ravel()
+
+        # Edges between consecutive points of each line.
+        line_ends = np.cumsum([len(coordinates) for coordinates, _ in lines])
+        is_edge = np.ones(len(points) - 1, dtype=bool)
+        is_edge[line_ends[:-1] - 1] = False
+        oneway = np.repeat([oneway for _, oneway in lines], [len(c) for c, _ in lines])[:-1]
+
+        return cls.from_edges(
+            nodes[:, 0],
+            nodes[:, 1],
+            node_idx[:-1][is_edge],
+            node_idx[1:][is_edge],
+            oneway[is_edge],
+        )
+
+    def nearest_node(self, lon: float, lat: float) -> int:
+        """Index of the node closest to the position."""
+        return int(np.argmin(haversine(lon, lat, self.node_lon, self.node_lat)))
+
+    def shortest_path(self, source: int, target: int) -> tuple[list, float]:
+        """Find the shortest path between two nodes with A*.
+
+        The great-circle distance to the target is used as heuristic. It never overestimates the
+        remaining distance, such that the path found is the shortest.
+
+        Args:
+            source:     Index of the start node.
+            target:     Index of the end node.
+
+        Returns:
+            path:       Indices of the nodes of the path.
+            distance:   Length of the path [m].
+
+        Raises:
+            LocalRouteError: When the nodes are not connected.
+        """
+        indptr, indices, weights = self._indptr, self._indices, self._weights
+
+        # The heuristic of all nodes at once, which is faster than per node in the search loop.
+        heuristic = haversine(
+            self.node_lon, self.node_lat, self.node_lon[target], self.node_lat[target]
+        ).tolist()
+
+        distances = {source: 0.0}
+        previous = {source: -1}
+        queue = [(heuristic[source], 0.0, source)]
+
+        while queue:
+            _, distance, node = heapq.heappop(queue)
+
+            if node == target:
+                path = [node]
+                while previous[path[-1]] >= 0:
+                    path.append(previous[path[-1]])
+
+                return path[::-1], distance
+
+            if distance > distances[node]:
+                # Outdated queue entry, the node was reached by a shorter path already.
+                continue
+
+            for edge in range(indptr[node], indptr[node + 1]):
+                neighbor = indices[edge]
+                neighbor_distance = distance + weights[edge]
+
+                if neighbor_distance < distances.get(neighbor, math.inf):
+                    distances[neighbor] = neighbor_distance
+                    previous[neighbor] = node
+                    heapq.heappush(
+                        queue, (neighbor_distance + heuristic[neighbor], neighbor_distance, neighbor)
+                    )
+
+        raise LocalRouteError(HTTPStatus.NOT_FOUND, "Waypoints not connected in road graph")
+
+
+class LocalRouteClient:
+    """Calculate routes along waypoints on a road graph."""
+
+    def __init__(self, graph: RoadGraph):
+        self.graph = graph
+
+    def get_route(self, waypoints: list) -> dict:
+        """Get the route along the waypoints.
+
+        Args:
+            waypoints:  [lon, lat] coordinates of the waypoints.
+
+        Returns:
+            route:      GeoJSON feature collection with the route geometry and its segments, like
+                the openrouteservice directions API.
+
+        Raises:
+            LocalRouteError: When there is no route between the waypoints.
+        """
+        nodes = [self.graph.nearest_node(lon, lat) for lon, lat in waypoints]
+        route_nodes = nodes[:1]
+        segments = []
+        way_points = [0]
+
+        for source, target in zip(nodes[:-1], nodes[1:]):
+            path, distance = self.graph.shortest_path(source, target)
+            route_nodes.extend(path[1:])
+            segments.append({"distance": distance, "steps": []})
+            way_points.append(len(route_nodes) - 1)
+
+        coordinates = np.c_[self.graph.node_lon[route_nodes], self.graph.node_lat[route_nodes]]
+
+        return {
+            "type": "FeatureCollection",
+            "features": [
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "LineString", "coordinates": coordinates.tolist()},
+                    "properties": {
+                        "segments": segments,
+                        "summary": {"distance": sum(s["distance"] for s in segments)},
+                        "way_points": way_points,
+                    },
+                }
+            ],
+        }
+
+
+@functools.lru_cache(maxsize=2)
+def get_client(graph_file: str) -> LocalRouteClient:
+    """Get the client for the road graph file, shared by all sessions."""
+    return LocalRouteClient(RoadGraph.load(graph_file))
+
+
+if __name__ == "__main__":
+    args_parser = argparse.ArgumentParser(description="Build a road graph for offline routing.")
+
+    args_parser.add_argument("roads", help="GeoJSON file with the roads as LineString features")
+    args_parser.add_argument("graph", help="road graph file to create (.npz)")
+
+    args = args_parser.parse_args()
+
+    graph = RoadGraph.from_geojson(args.roads)
+    graph.save(args.graph)
+    print(f"Road graph with {len(graph.node_lon)} nodes and {len(graph.indices)} edges saved.")
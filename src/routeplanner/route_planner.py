@@ -1,15 +1,27 @@
+import functools
 import json
 import math
+import os
 import re
-import time
 from http import HTTPStatus
 from os import path
 
+import numpy as np
 import pandas as pd
 import plotly.express as px
-import requests
 from simian.gui import Form, component, component_properties, utils
 
+from array_encoding import encode_array
+from routeplanner import (
+    charge_planner,
+    disk_cache,
+    fleet_comparison,
+    geometry,
+    here_lookup,
+    local_router,
+    route_service,
+)
+
 # Template syntax helpers for slightly more readable formio template construction using f-strings.
 # Avoids having to escape (by doubling them) the many braces used in templates. Some may not be used.
 # Start & end scripting block - not displayed
@@ -24,6 +36,25 @@ SCRIPT_BLOCK_CLOSE = "}"
 TMPL_DISPLAY_DATA_START = "{{"
 TMPL_DISPLAY_DATA_END = "}}"
 
+# Image name and product url in the legacy marketing field of the vehicle data.
+IMAGE_NAME_PATTERN = re.compile("#pic#([^#]+)")
+PRODUCT_URL_PATTERN = re.compile("#www#([^#]+)")
+
+# Truck fields sent to the frontend, as used by the truck select and the truck details tables. The
+# other fields are looked up server side by the index of the selected truck.
+TRUCK_FIELDS = ["value", "label", "product_url"]
+TRUCK_DETAIL_FIELDS = {
+    "driveTrain": [
+        "maxSpeed",
+        "ecoSpeed",
+        "officialRange",
+        "totalBatteryCapacity",
+        "acCharging",
+        "dcCharging",
+    ],
+    "dimensions": ["emptyWeight", "totalPermittedWeight"],
+}
+
 # Run this file locally
 if __name__ == "__main__":
     import simian.local
@@ -109,6 +140,15 @@ def gui_event(meta_data: dict, payload: dict) -> dict:
         meta_data["application_data"]["here_backend_lookup_interval_ms"] / 1000
     )
     here_backend_api_key = meta_data["application_data"]["here_backend_api_key"]
+    cache_file = meta_data["application_data"].get("cache_file", disk_cache.CACHE_FILE)
+    here_lookup_cache_ttl_days = meta_data["application_data"].get(
+        "here_lookup_cache_ttl_days", here_lookup.CACHE_TTL_DAYS
+    )
+    route_cache_ttl_days = meta_data["application_data"].get(
+        "route_cache_ttl_days", route_service.CACHE_TTL_DAYS
+    )
+    local_road_graph_file = meta_data["application_data"].get("local_road_graph_file")
+    charging_stations_file = meta_data["application_data"].get("charging_stations_file")
     open_route_service_api_key = meta_data["application_data"][
         "open_route_service_api_key"
     ]
@@ -124,8 +164,9 @@ def gui_event(meta_data: dict, payload: dict) -> dict:
         plot_obj, _ = utils.getSubmissionData(payload, "plot")
         waypoints = utils.getSubmissionData(payload, "waypoints")[0]
 
-        truck = utils.getSubmissionData(payload, "selectTruck")
-        range = truck[0]["driveTrain"]["officialRange"]
+        truck_selection, _ = utils.getSubmissionData(payload, "selectTruck")
+        truck = get_truck(truck_selection["value"])
+        range = truck["driveTrain"]["officialRange"]
 
         locations = []
         if waypoints:
@@ -140,49 +181,42 @@ def gui_event(meta_data: dict, payload: dict) -> dict:
                 "danger",
             )
         else:
-            here_headers = {
-                "Accept": "application/json, application/geo+json, application/gpx+xml, img/png; charset=utf-8",
-                "Content-Type": "application/json; charset=utf-8",
-            }
+            # Look up the positions of the locations at here.com, or in the lookup cache.
+            here_client = here_lookup.get_client(
+                here_backend_api_key,
+                here_backend_lookup_interval,
+                cache_file,
+                here_lookup_cache_ttl_days,
+            )
 
-            locations_data = []
-            for location in locations:
-                location_id = location["id"]
-                here_call = requests.get(
-                    f"https://lookup.search.hereapi.com/v1/lookup?id={location_id}&apiKey={here_backend_api_key}",
-                    headers=here_headers,
+            try:
+                locations_data = here_client.lookup_all(
+                    [location["id"] for location in locations]
                 )
+            except here_lookup.HereLookupError as exc:
+                locations_data = []
 
-                if here_call.status_code == HTTPStatus.FORBIDDEN:
+                if exc.status_code == HTTPStatus.FORBIDDEN:
                     payload = utils.addAlert(
                         payload,
                         (
                             "Call to here.com forbidden, "
-                            f"check API key in application data ({str(here_call.status_code)} - {here_call.reason})."
+                            f"check API key in application data ({exc})."
                         ),
                         "danger",
                     )
-                    break
-                elif not here_call.status_code == HTTPStatus.OK:
+                else:
                     payload = utils.addAlert(
                         payload,
-                        (
-                            "Call to here.com API failed "
-                            f"({str(here_call.status_code)} - {here_call.reason})."
-                        ),
+                        f"Call to here.com API failed ({exc}).",
                         "danger",
                     )
-                    break
-                else:
-                    # Get the route infor from the web call
-                    locations_data.append(here_call.json())
-                    time.sleep(here_backend_lookup_interval)
 
             # The route
             route = {}
 
             if len(locations_data) > 0:
-                # Call openrouteservice with waypoints and API key
+                # Get the route from openrouteservice, or from the route cache.
 
                 lon_latList = list(
                     map(
@@ -190,42 +224,100 @@ def gui_event(meta_data: dict, payload: dict) -> dict:
                         locations_data,
                     )
                 )
-                call = get_route(
-                    lon_latList,
-                    open_route_service_api_key,
-                )
+                if local_road_graph_file:
+                    # Route offline on the local road graph instead.
+                    route_client = local_router.get_client(local_road_graph_file)
+                else:
+                    route_client = route_service.get_client(
+                        open_route_service_api_key, cache_file, route_cache_ttl_days
+                    )
 
-                if call.status_code == HTTPStatus.FORBIDDEN:
+                try:
+                    route = route_client.get_route(lon_latList)
+                except local_router.LocalRouteError as exc:
                     payload = utils.addAlert(
                         payload,
-                        (
-                            "Call to openrouteservice.org forbidden, "
-                            f"check API key in application data ({str(call.status_code)} - {call.reason})."
-                        ),
+                        f"No route found on the local road graph ({exc}).",
                         "danger",
                     )
-                elif not call.status_code == HTTPStatus.OK:
-                    payload = utils.addAlert(
-                        payload,
-                        (
-                            "Call to openrouteservice.org API failed, "
-                            f"try reducing total distance ({str(call.status_code)} - {call.reason})."
-                        ),
-                        "danger",
+                except route_service.RouteServiceError as exc:
+                    if exc.status_code == HTTPStatus.FORBIDDEN:
+                        payload = utils.addAlert(
+                            payload,
+                            (
+                                "Call to openrouteservice.org forbidden, "
+                                f"check API key in application data ({exc})."
+                            ),
+                            "danger",
+                        )
+                    else:
+                        payload = utils.addAlert(
+                            payload,
+                            (
+                                "Call to openrouteservice.org API failed, "
+                                f"try reducing total distance ({exc})."
+                            ),
+                            "danger",
+                        )
+
+                if route:
+                    # Plan the charge stops of the truck along the route, or of all trucks in one
+                    # pass when comparing them.
+                    compare_trucks, _ = utils.getSubmissionData(payload, "compareTrucks")
+
+                    if compare_trucks:
+                        truck_table = load_truck_table()
+                        ranges = truck_table["range"] * 1000
+                        plan_idx = truck_selection["value"]
+                    else:
+                        ranges = [range * 1000]
+                        plan_idx = 0
+
+                    plan = charge_planner.plan_route(
+                        route["features"][0]["geometry"]["coordinates"],
+                        ranges,
+                        route["features"][0]["properties"]["way_points"],
+                        charging_stations_file,
+                    )
+                    charge_stops = plan["stops"][plan_idx][plan["stops"][plan_idx] >= 0]
+
+                    if compare_trucks:
+                        comparison = fleet_comparison.compare_trucks(truck_table, plan)
+                        comparison = comparison.astype(object).where(comparison.notna(), None)
+                        payload, _ = utils.setSubmissionData(
+                            payload, "fleetComparison", comparison.to_dict("records")
+                        )
+
+                    if not plan["feasible"][plan_idx]:
+                        payload = utils.addAlert(
+                            payload,
+                            (
+                                "Route cannot be completed with the range of the truck "
+                                f"({range} km), not enough charge stops found along the route."
+                            ),
+                            "warning",
+                        )
+
+                    # Pass waypoints, route and charge stops to update the plot.
+                    update_plot(
+                        plot_obj,
+                        locations_data,
+                        route,
+                        {
+                            name: plan["candidates"][name][charge_stops]
+                            for name in ["lon", "lat", "name"]
+                        },
                     )
-                else:
-                    # Get the route infor from the web call
-                    route = call.json()
-
-                    # Pass waypoints and route to update the plot.
-                    update_plot(plot_obj, locations_data, route)
 
                     # report distances and number of required charges
                     for idx, waypoint in enumerate(waypoints):
+                        waypoint["chargeStops"] = int(
+                            plan["waypoint_stops"][plan_idx][idx]
+                        )
+
                         if idx == 0:
                             waypoint["legDistance"] = 0
                             waypoint["totalDistance"] = 0
-                            waypoint["chargeStops"] = 0
                         else:
                             waypoint["legDistance"] = (
                                 route["features"][0]["properties"]["segments"][idx - 1][
@@ -237,12 +329,6 @@ def gui_event(meta_data: dict, payload: dict) -> dict:
                                 waypoints[idx - 1]["totalDistance"]
                                 + waypoint["legDistance"]
                             )
-                            #                            waypoint["chargeStops"] = waypoints[idx - 1]["chargeStops"] + math.ceil(
-                            #                                waypoint["legDistance"] / range
-                            #                            )
-                            waypoint["chargeStops"] = math.ceil(
-                                waypoint["totalDistance"] / range
-                            )
 
                     # Update the payload with the waypoint info.
                     payload, _ = utils.setSubmissionData(
@@ -356,6 +442,22 @@ def create_route_panel(
     calculate.size = "lg"
     calculate.tooltip = "Select truck and 2 to 4 waypoints."
 
+    # Compare all trucks on the route, in a sortable table.
+    compare_trucks = component.Checkbox("compareTrucks", route_panel)
+    compare_trucks.label = "Compare all trucks on the route"
+    compare_trucks.defaultValue = False
+    compare_trucks.addCustomClass("mt-3")
+
+    fleet_table = component.DataTables("fleetComparison", route_panel)
+    fleet_table.label = "Truck comparison"
+    fleet_table.setFeatures(searching=True, ordering=True, paging=True)
+    fleet_table.setOptions(pageLength=10)
+    column_ids, column_names = zip(*fleet_comparison.COMPARISON_COLUMNS)
+    fleet_table.setColumns(
+        list(column_names), list(column_ids), visible=[False] + [True] * (len(column_ids) - 1)
+    )
+    fleet_table.customConditional = "show = data.compareTrucks;"
+
     return route_panel
 
 
@@ -581,8 +683,8 @@ def get_truck_details_table_template(details) -> str:
     return table_html
 
 
-def update_plot(plot_obj, locations_data, route):
-    """Update the plot with waypoint and route data."""
+def update_plot(plot_obj, locations_data, route, charge_stops=None):
+    """Update the plot with waypoint, route and charge stop data."""
     lon = []
     lat = []
     auto_zoom = 2
@@ -592,9 +694,13 @@ def update_plot(plot_obj, locations_data, route):
 
     # When route is present, extract lon and lat, and calculate a zoom factor
     if route:
-        # Prepare route lon, lat info for plotly
-        lon, lat = map(list, zip(*route["features"][0]["geometry"]["coordinates"]))
+        # Prepare route lon, lat info for plotly. The route is simplified for the zoom level and
+        # sent as compact typed arrays, the full route is only used server side.
+        coordinates = np.asarray(route["features"][0]["geometry"]["coordinates"])
+        lon, lat = coordinates[:, 0], coordinates[:, 1]
         auto_zoom = calculate_zoom(lon, lat)
+        keep = geometry.simplify_route(lon, lat, auto_zoom)
+        lon, lat = encode_array(lon[keep]), encode_array(lat[keep])
 
     # suboptimal conversion moving from static file based data to here.com data
     if len(locations_data) > 0:
@@ -634,6 +740,17 @@ def update_plot(plot_obj, locations_data, route):
         mode="lines",
     )
 
+    # Draw the planned charge stops
+    if charge_stops is not None:
+        plot_obj.figure.add_scattermapbox(
+            lon=charge_stops["lon"],
+            lat=charge_stops["lat"],
+            hovertext=charge_stops["name"],
+            hoverinfo="text",
+            marker={"color": "green", "size": 12},
+            mode="markers",
+        )
+
     # Set map style, remove margins and legend
     plot_obj.figure.update_layout(
         mapbox_style="open-street-map",
@@ -648,8 +765,8 @@ def calculate_zoom(lon: list, lat: list) -> float:
     # Notable comment from creator:
     # "I should mention this has only been tested for regional (USA) coordinates, I could see
     # it needing modification when crossing hemispheres/equator"
-    zoom_lat = abs(abs(max(lat)) - abs(min(lat)))
-    zoom_lon = abs(abs(max(lon)) - abs(min(lon)))
+    zoom_lat = abs(abs(np.max(lat)) - abs(np.min(lat)))
+    zoom_lon = abs(abs(np.max(lon)) - abs(np.min(lon)))
     zoom_factor = max([zoom_lat, zoom_lon])
     if zoom_factor < 0.002:
         zoom_factor = 0.002
@@ -658,49 +775,62 @@ def calculate_zoom(lon: list, lat: list) -> float:
     return zoom
 
 
-def get_route(waypoints: list, openrouteservice_api_key: str) -> dict:
-    """Do the actual call to openrouteservice.org to get route information."""
+def get_truck_data(image_base_url) -> dict:
+    """Get the truck info for frontend consumption, limited to the fields used in the frontend."""
+    vehicles = []
 
-    # See: https://openrouteservice.org/dev/#/api-docs
-    body = {"coordinates": waypoints}
+    for vehicle in load_truck_catalogue():
+        truck = {field: vehicle[field] for field in TRUCK_FIELDS}
+        truck["img_url"] = image_base_url + vehicle["img_name"]
 
-    headers = {
-        "Accept": "application/json, application/geo+json, application/gpx+xml, img/png; charset=utf-8",
-        "Authorization": openrouteservice_api_key,
-        "Content-Type": "application/json; charset=utf-8",
-    }
+        for group, fields in TRUCK_DETAIL_FIELDS.items():
+            truck[group] = {field: vehicle[group][field] for field in fields}
+
+        vehicles.append(truck)
+
+    return {"vehicles": vehicles}
+
+
+def get_truck(index: int) -> dict:
+    """Get all info of the truck with the given index (value of the truck select)."""
+    return load_truck_catalogue()[int(index)]
 
-    call = requests.post(
-        "https://api.openrouteservice.org/v2/directions/driving-car/geojson",
-        json=body,
-        headers=headers,
+
+def load_truck_catalogue() -> list:
+    """Load the preprocessed truck catalogue, reusing it until the vehicle data file changes."""
+    truck_data_file = path.join(
+        path.dirname(path.realpath(__file__)), "resources", "vehicle_data.json"
     )
 
-    return call
+    return _read_truck_catalogue(truck_data_file, os.stat(truck_data_file).st_mtime_ns)
 
 
-def get_truck_data(image_base_url) -> dict:
-    """Read truck info from json file and preprocess for frontend consumption."""
+def load_truck_table():
+    """Load the columnar truck table for the truck comparison, in the order of the catalogue."""
     truck_data_file = path.join(
         path.dirname(path.realpath(__file__)), "resources", "vehicle_data.json"
     )
 
+    return _read_truck_table(truck_data_file, os.stat(truck_data_file).st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=1)
+def _read_truck_table(truck_data_file: str, mtime: int):
+    """Create the truck table from the truck catalogue. Cached per modification time."""
+    return fleet_comparison.truck_table(_read_truck_catalogue(truck_data_file, mtime))
+
+
+@functools.lru_cache(maxsize=1)
+def _read_truck_catalogue(truck_data_file: str, _mtime: int) -> list:
+    """Read truck info from json file and preprocess it. Cached per modification time."""
     with open(truck_data_file) as f:
         truck_data = json.load(f)
 
     for idx, vehicle in enumerate(truck_data["vehicles"]):
-        image_name = (
-            re.compile("#pic#([^#]+)").findall(
-                vehicle["commercial"]["legacyMarketingField"]
-            )[0]
-            + ".png"
-        )
+        marketing_field = vehicle["commercial"]["legacyMarketingField"]
+        vehicle["img_name"] = IMAGE_NAME_PATTERN.findall(marketing_field)[0] + ".png"
 
-        vehicle["img_url"] = image_base_url + image_name
-
-        product_url = re.compile("#www#([^#]+)").findall(
-            vehicle["commercial"]["legacyMarketingField"]
-        )
+        product_url = PRODUCT_URL_PATTERN.findall(marketing_field)
 
         if product_url and len(product_url) > 0:
             vehicle["product_url"] = product_url[0]
@@ -715,4 +845,4 @@ def get_truck_data(image_base_url) -> dict:
 
         vehicle["value"] = idx
 
-    return truck_data
+    return truck_data["vehicles"]
@@ -0,0 +1,142 @@
+"""Client for the openrouteservice.org directions API.
+
+Calculates the route along the waypoints chosen in the route planner. Routes are cached by their
+waypoint coordinates in memory and in a persistent cache shared by all sessions, such that a route
+is not calculated again when only the selected truck changed or calculate is clicked again.
+"""
+
+import functools
+import json
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+
+import requests
+
+from routeplanner.disk_cache import CACHE_FILE, DiskCache
+
+ROUTE_URL = "https://api.openrouteservice.org/v2/directions/driving-car/geojson"
+ROUTE_HEADERS = {
+    "Accept": "application/json, application/geo+json, application/gpx+xml, img/png; charset=utf-8",
+    "Content-Type": "application/json; charset=utf-8",
+}
+TIMEOUT = 30
+
+# Waypoint coordinates are rounded to 5 decimals (about 1 m) in the cache key.
+COORDINATE_DECIMALS = 5
+
+# Number of routes in the memory cache, and time-to-live of routes in the persistent cache.
+MEMORY_CACHE_SIZE = 128
+CACHE_TTL_DAYS = 7
+
+
+class RouteServiceError(Exception):
+    """Route calculation at openrouteservice.org failed."""
+
+    def __init__(self, status_code: int, reason: str):
+        super().__init__(f"{status_code} - {reason}")
+        self.status_code = status_code
+        self.reason = reason
+
+
+class RouteClient:
+    """Calculate routes along waypoints."""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = ROUTE_URL,
+        cache: DiskCache | None = None,
+        memory_cache_size: int = MEMORY_CACHE_SIZE,
+    ):
+        self.base_url = base_url
+        self.cache = cache
+        self.memory_cache_size = memory_cache_size
+        self._memory_cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.headers.update({**ROUTE_HEADERS, "Authorization": api_key})
+
+    def get_route(self, waypoints: list) -> dict:
+        """Get the route along the waypoints, from the cache when calculated before.
+
+        Args:
+            waypoints:  [lon, lat] coordinates of the waypoints.
+
+        Returns:
+            route:      GeoJSON feature collection with the route geometry and its segments.
+
+        Raises:
+            RouteServiceError: When the route calculation failed.
+        """
+        key = route_key(waypoints)
+
+        with self._lock:
+            if key in self._memory_cache:
+                self._memory_cache.move_to_end(key)
+                return self._memory_cache[key]
+
+        route = self.cache.get_many([key]).get(key) if self.cache is not None else None
+
+        if route is None:
+            route = self.calculate_route(waypoints)
+
+            if self.cache is not None:
+                self.cache.put_many({key: route})
+
+        with self._lock:
+            self._memory_cache[key] = route
+            self._memory_cache.move_to_end(key)
+
+            while len(self._memory_cache) > self.memory_cache_size:
+                self._memory_cache.popitem(last=False)
+
+        return route
+
+    def calculate_route(self, waypoints: list) -> dict:
+        """Calculate the route along the waypoints at openrouteservice.org.
+
+        Args:
+            waypoints:  [lon, lat] coordinates of the waypoints.
+
+        Returns:
+            route:      GeoJSON feature collection with the route geometry and its segments.
+
+        Raises:
+            RouteServiceError: When the route calculation failed.
+        """
+        # See: https://openrouteservice.org/dev/#/api-docs
+        response = self.session.post(
+            self.base_url, json={"coordinates": waypoints}, timeout=TIMEOUT
+        )
+
+        if response.status_code != HTTPStatus.OK:
+            raise RouteServiceError(response.status_code, response.reason)
+
+        return response.json()
+
+
+def route_key(waypoints: list) -> str:
+    """Cache key of the route: the ordered waypoint coordinates, rounded."""
+    return json.dumps(
+        [[round(coordinate, COORDINATE_DECIMALS) for coordinate in point] for point in waypoints]
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def get_client(
+    api_key: str,
+    cache_file: str = CACHE_FILE,
+    cache_ttl_days: float = CACHE_TTL_DAYS,
+) -> RouteClient:
+    """Get the client for the API key.
+
+    The client is shared by all sessions, such that its connections and memory cache are shared too.
+    Routes are cached in the given database file as well, unless the time-to-live is 0.
+    """
+    cache = None
+    if cache_ttl_days > 0:
+        cache = DiskCache("routes", cache_ttl_days * 24 * 3600, cache_file)
+
+    return RouteClient(api_key, cache=cache)
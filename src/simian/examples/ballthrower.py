@@ -3,6 +3,8 @@ import logging
 import math
 import os
 
+import numpy as np
+
 from simian.examples.ballthrower_engine import BallThrower
 from simian.gui import Form, component, component_properties, utils
 
@@ -12,6 +14,15 @@ LABEL_LEFT = {"labelPosition": "left-left"}
 INLINE = {"customClass": "form-check-inline"}
 SHOW_LABEL = {"hideLabel": False}
 
+# Number of points per trajectory that is sent to the plot.
+TRAJECTORY_POINTS = 100
+
+# Name of the session cache entry holding all throws, and the number of most recent throws that
+# are shown in the plot and table.
+HISTORY_CACHE = "throw_history"
+MAX_PLOTTED_THROWS = 10
+MAX_TABLE_ROWS = 100
+
 
 if __name__ == "__main__":
     # Run as a script
@@ -45,7 +56,7 @@ def gui_event(meta_data: dict, payload: dict) -> dict:
     return payload
 
 
-def throwing(_meta_data: dict, payload: dict) -> dict:
+def throwing(meta_data: dict, payload: dict) -> dict:
     """Simulate throwing a ball.
 
     Get the settings from the payload and multiply with the enabled states to switch off parts of
@@ -75,40 +86,36 @@ def throwing(_meta_data: dict, payload: dict) -> dict:
         g=gravity,
         m=mass_ball,
         w=wind_speed,
+        n_points=TRAJECTORY_POINTS,
     )
 
-    # Create a Plotly object from the information in the payload.
-    plot_obj, _ = utils.getSubmissionData(payload, key="plot")
-
-    # Plot the new newly calculated x and y values, append the legend and put the plotly
-    # object in the submission data.
-    nr = len(plot_obj.figure.data) + 1
-    plot_obj.figure.add_scatter(x=x, y=y, name=f"Attempt {nr}", mode="lines")
-    utils.setSubmissionData(payload, key="plot", data=plot_obj)
+    # Register the throw in the history kept in the session cache. The trajectory is kept as
+    # float32, which Plotly sends to the browser as a compact typed array.
+    history = _get_throw_history(meta_data)
+    nr = len(history) + 1
+    history.append(
+        {
+            "x": x.astype(np.float32),
+            "y": y.astype(np.float32),
+            "row": {
+                "id": nr,
+                "attempt": nr,
+                "hor_speed": round(hor_speed, 3),
+                "ver_speed": round(ver_speed, 3),
+                "wind_speed": wind_speed,
+                "ball_mass": mass_ball,
+                "radius": radius_ball,
+                "drag": drag_coeff,
+                "gravity": gravity,
+                "air_density": rho_air,
+            },
+        }
+    )
+    utils.setCache(meta_data, HISTORY_CACHE, history)
 
-    # Update the table with the settings used for the throws.
-    new_row = [
-        nr,
-        nr,
-        round(hor_speed, 3),
-        round(ver_speed, 3),
-        wind_speed,
-        mass_ball,
-        radius_ball,
-        drag_coeff,
-        gravity,
-        rho_air,
-    ]
-
-    if nr == 1:
-        # First throw. Only put the new row in the table.
-        new_table_values = [new_row]
-    else:
-        # Extra row. Append the row to the DataFrame from the submission data.
-        new_table_values, _ = utils.getSubmissionData(payload, key="summary")
-        new_table_values.append(dict(zip(new_table_values[0].keys(), new_row)))
-
-    utils.setSubmissionData(payload, key="summary", data=new_table_values)
+    # Only put the most recent throws in the plot and table, such that the size of the payload
+    # does not grow with the number of throws.
+    _show_throw_history(payload, history)
 
     # Accept all changes to settings and lower the changes flag.
     payload["pristine"] = True
@@ -116,21 +123,44 @@ def throwing(_meta_data: dict, payload: dict) -> dict:
     return payload
 
 
-def clearHistory(_meta_data: dict, payload: dict) -> dict:
+def clearHistory(meta_data: dict, payload: dict) -> dict:
     """Clears the data from the plot and table."""
-    # Clear the data from the plot.
-    plot_obj, _ = utils.getSubmissionData(payload, "plot")
-    plot_obj.figure.data = []
-    utils.setSubmissionData(payload, key="plot", data=plot_obj)
-
-    # Clear the values in the table.
-    utils.setSubmissionData(payload, key="summary", data=[])
+    # Clear the throws stored in the session cache, and the data from the plot and table.
+    utils.setCache(meta_data, HISTORY_CACHE, [])
+    _show_throw_history(payload, [])
 
     payload = utils.addAlert(payload, "History of throws cleared.", "info")
 
     return payload
 
 
+def _get_throw_history(meta_data: dict) -> list:
+    """Get the list of throws from the session cache."""
+    history, is_found = utils.getCache(meta_data, HISTORY_CACHE)
+    if not is_found:
+        history = []
+
+    return history
+
+
+def _show_throw_history(payload: dict, history: list) -> None:
+    """Put the most recent throws of the history in the plot and table."""
+    # Create a Plotly object from the information in the payload and replace its traces.
+    plot_obj, _ = utils.getSubmissionData(payload, key="plot")
+    plot_obj.figure.data = []
+
+    for throw in history[-MAX_PLOTTED_THROWS:]:
+        nr = throw["row"]["attempt"]
+        plot_obj.figure.add_scatter(x=throw["x"], y=throw["y"], name=f"Attempt {nr}", mode="lines")
+
+    utils.setSubmissionData(payload, key="plot", data=plot_obj)
+
+    # Update the table with the settings used for the throws.
+    utils.setSubmissionData(
+        payload, key="summary", data=[throw["row"] for throw in history[-MAX_TABLE_ROWS:]]
+    )
+
+
 def causeError(_meta_data: dict, payload: dict) -> dict:
     """Throws an error so that the user can see the error handling in action."""
     raise RuntimeError("Error thrown for testing the error handling mechanism.")
@@ -384,7 +414,8 @@ def _fill_settings_tab(tab_settings):
     # Create a table to store the throw settings in.
     table_out = component.DataTables(key="summary", parent=tab_settings)
     table_out.label = "Used settings per throw"
-    table_out.setFeatures(searching=False, ordering=False, paging=False)
+    table_out.setFeatures(searching=False, ordering=False, paging=True)
+    table_out.setOptions(pageLength=10)
     table_out.setColumns(
         *[
             list(x)
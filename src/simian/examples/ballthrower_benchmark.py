@@ -0,0 +1,170 @@
+"""Benchmark of the Ball Thrower solver.
+
+Measures the time per throw, the number of right-hand side evaluations and the error in the
+landing distance with respect to a high-precision reference solution, for a set of cases within
+the validation ranges of the Ball Thrower form.
+
+Run from the `src` folder with:
+
+    python -m simian.examples.ballthrower_benchmark
+"""
+
+import argparse
+import math
+import time
+
+import numpy as np
+from scipy.integrate import solve_ivp
+
+from simian.examples.ballthrower_engine import BallThrower
+
+# Benchmark cases: name and keyword arguments of BallThrower.throw_ball. Speeds are given as throw
+# speed [m/s] and angle [degrees] and are converted to the speed components.
+CASES = [
+    ["no drag", {"speed": 10, "angle": 45, "Cd": 0}],
+    ["drag", {"speed": 10, "angle": 45}],
+    ["drag, tailwind", {"speed": 10, "angle": 45, "w": 10}],
+    ["drag, headwind", {"speed": 10, "angle": 45, "w": -10}],
+    ["max speed, flat", {"speed": 20 * math.sqrt(2), "angle": 1}],
+    ["max speed, steep", {"speed": 20 * math.sqrt(2), "angle": 89}],
+    ["low gravity", {"speed": 20 * math.sqrt(2), "angle": 45, "g": -0.1}],
+    ["high gravity", {"speed": 20 * math.sqrt(2), "angle": 45, "g": -20}],
+    ["max drag", {"speed": 20 * math.sqrt(2), "angle": 45, "Cd": 10, "rho": 10}],
+    ["light ball", {"speed": 20 * math.sqrt(2), "angle": 45, "m": 0.005, "w": -10}],
+]
+
+BATCH_SIZES = [1, 10, 100]
+
+
+def _throw_kwargs(case: dict) -> dict:
+    """Convert the benchmark case to keyword arguments of BallThrower.throw_ball."""
+    kwargs = dict(case)
+    speed = kwargs.pop("speed")
+    angle = kwargs.pop("angle") / 180 * math.pi
+
+    return {"u0": speed * math.cos(angle), "v0": speed * math.sin(angle), **kwargs}
+
+
+def reference_distance(
+    u0: float = 10,
+    v0: float = 10,
+    Cd: float = 0.4,
+    r: float = 0.05,
+    rho: float = 1.239,
+    g: float = -9.81,
+    m: float = 0.1,
+    w: float = 0,
+) -> float:
+    """Landing distance of a ball thrown from the origin, computed with a high-precision solver.
+
+    Args:
+        See BallThrower.throw_ball.
+
+    Returns:
+        distance:   Horizontal distance at which the ball lands [m].
+    """
+    g = abs(g) * -1
+
+    if Cd == 0:
+        # Analytic solution without drag.
+        return -2 * u0 * v0 / g
+
+    def _zero_crossing(_t, y, *_args):
+        return y[2]
+
+    _zero_crossing.terminal = True
+    _zero_crossing.direction = -1
+
+    outputs = solve_ivp(
+        fun=BallThrower._drag_ball,
+        t_span=[0, np.inf],
+        y0=[0, u0, 0, v0],
+        method="DOP853",
+        events=_zero_crossing,
+        args=(Cd, r, rho, g, m, w),
+        rtol=1e-13,
+        atol=1e-13,
+    )
+
+    return outputs.y_events[0][0][0]
+
+
+def benchmark_case(kwargs: dict, batch_size: int, n_points: int | None = None) -> dict:
+    """Benchmark a number of throws with the same settings.
+
+    Args:
+        kwargs:         Keyword arguments of BallThrower.throw_ball.
+        batch_size:     Number of throws to do.
+        n_points:       Number of points of the resampled trajectories. Defaults to None.
+
+    Returns:
+        result:         Time per throw [ms], right-hand side calls per throw and landing distance
+            error [m].
+    """
+    drag_ball = BallThrower._drag_ball
+    nr_calls = 0
+
+    def _counting_drag_ball(*args):
+        nonlocal nr_calls
+        nr_calls += 1
+        return drag_ball(*args)
+
+    # Count the right-hand side evaluations of the solver.
+    BallThrower._drag_ball = staticmethod(_counting_drag_ball)
+
+    try:
+        start = time.perf_counter()
+
+        for _ in range(batch_size):
+            _t, x, _y, _u, _v = BallThrower.throw_ball(**kwargs, n_points=n_points)
+
+        elapsed = time.perf_counter() - start
+
+    finally:
+        BallThrower._drag_ball = staticmethod(drag_ball)
+
+    return {
+        "time": elapsed / batch_size * 1000,
+        "rhs_calls": nr_calls / batch_size,
+        "error": abs(x[-1] - reference_distance(**kwargs)),
+    }
+
+
+def run(batch_sizes: list[int], n_points: int | None = None) -> None:
+    """Run all benchmark cases and print the results."""
+    print(f"{'case':<18}{'batch':>7}{'ms/throw':>12}{'rhs/throw':>12}{'error [m]':>12}")
+
+    for name, case in CASES:
+        kwargs = _throw_kwargs(case)
+
+        for batch_size in batch_sizes:
+            result = benchmark_case(kwargs, batch_size, n_points)
+            print(
+                f"{name:<18}{batch_size:>7}{result['time']:>12.3f}{result['rhs_calls']:>12.0f}"
+                f"{result['error']:>12.2e}"
+            )
+
+
+if __name__ == "__main__":
+    args_parser = argparse.ArgumentParser(description="Ball Thrower solver benchmark.")
+
+    args_parser.add_argument(
+        "-b",
+        "--batch-sizes",
+        type=int,
+        nargs="+",
+        default=BATCH_SIZES,
+        help="numbers of throws per case",
+    )
+
+    args_parser.add_argument(
+        "-n",
+        "--n-points",
+        type=int,
+        default=None,
+        help="number of points of the resampled trajectories",
+    )
+
+    args = args_parser.parse_args()
+
+    run(args.batch_sizes, args.n_points)
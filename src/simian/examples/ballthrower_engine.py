@@ -22,6 +22,7 @@ class BallThrower:
         g: float = -9.81,
         m: float = 0.1,
         w: float = 0,
+        n_points: int | None = None,
     ) -> list:
         """Ball thrower solver.
 
@@ -36,6 +37,9 @@ class BallThrower:
             g:      Gravitational pull [m/s2]. Defaults to -9.81.
             m:      Mass of the ball [kg]. Defaults to 0.1.
             w:      Wind speed [m/s]. Defaults to 0.
+            n_points:   Number of points in the returned trajectory. When given, the dense output
+                of the solver is resampled at equidistant time stamps between the throw and the
+                impact. When None, all solver steps are returned. Defaults to None.
 
         Returns:
             t:      Time stamps (in seconds).
@@ -57,17 +61,27 @@ class BallThrower:
         # Solve the differential equation.
         outputs = solve_ivp(
             fun=BallThrower._drag_ball,
-            t_span=[0, np.Inf],
+            t_span=[0, np.inf],
             y0=[x0, u0, y0, v0],
             events=_zero_crossing,
             args=(Cd, r, rho, g, m, w),
             rtol=1e-8,
             atol=1e-8,
             max_step=0.1,
+            dense_output=n_points is not None,
         )
 
-        t = outputs.t
-        y = outputs.y
+        if n_points is None:
+            t = outputs.t
+            y = outputs.y
+        else:
+            # Resample the continuous solution, keeping the (exact) impact point as the last point.
+            t = np.linspace(0, outputs.t[-1], max(n_points, 2))
+            y = outputs.sol(t)
+
+            if outputs.t_events[0].size:
+                t[-1] = outputs.t_events[0][0]
+                y[:, -1] = outputs.y_events[0][0]
 
         # Return the time stamps, location and speed components.
         return t, y[0], y[2], y[1], y[3]
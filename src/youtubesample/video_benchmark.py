@@ -0,0 +1,178 @@
+"""Benchmark of the preprocessing of the trending videos.
+
+Measures the preprocessing of a table of synthetic videos (durations, statistics and the HTML of
+the video lists of all videos) for a range of numbers of videos, and compares it with the previous
+row-wise implementation. Also measures the creation of a scatter plot from the statistics as
+strings (as returned by the API) and as numbers.
+
+The previous implementation parses the durations with isodate, which must be installed. Run from
+the `src` folder with:
+
+    python -m youtubesample.video_benchmark
+"""
+
+import argparse
+import time
+
+import isodate
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from youtubesample import video_metrics
+
+N_VIDEOS = [25, 250, 2500]
+
+
+def synthetic_videos(n_videos: int, seed: int = 0) -> pd.DataFrame:
+    """Table of synthetic videos, with the columns used by the app as returned by the API."""
+    rng = np.random.default_rng(seed)
+    hours = rng.integers(0, 3, n_videos)
+    minutes = rng.integers(0, 60, n_videos)
+    seconds = rng.integers(0, 60, n_videos)
+
+    durations = [
+        "PT" + (f"{h}H" if h else "") + (f"{m}M" if m else "") + (f"{s}S" if s or not m else "")
+        for h, m, s in zip(hours, minutes, seconds)
+    ]
+    views = rng.integers(1000, 10_000_000, n_videos)
+
+    return pd.DataFrame(
+        {
+            "id": [f"video{i:06d}" for i in range(n_videos)],
+            "snippet.title": [f'Trending video "{i}" & more' for i in range(n_videos)],
+            "contentDetails.duration": durations,
+            "statistics.viewCount": views.astype(str),
+            "statistics.likeCount": (views // rng.integers(10, 100, n_videos)).astype(str),
+            "statistics.commentCount": (views // rng.integers(100, 1000, n_videos)).astype(str),
+        }
+    )
+
+
+def _preprocess_rowwise(video_df: pd.DataFrame) -> tuple[str, str]:
+    """Previous implementation: per-row duration parsing and list comprehensions for the HTML."""
+    video_title_array = [video for video in video_df["snippet.title"]]
+    video_link_array = ["https://www.youtube.com/watch?v=" + video for video in video_df["id"]]
+    video_thumbnail_array = [
+        "https://img.youtube.com/vi/" + video + "/mqdefault.jpg" for video in video_df["id"]
+    ]
+    full_references = [
+        f'<a href="{x[0]}/" target="_blank"><img src="{x[2]}" title="{x[1]}"></a>'
+        for x in zip(video_link_array, video_title_array, video_thumbnail_array)
+    ]
+    full_references_html = (
+        '<div class="d-flex flex-row flex-wrap">'
+        + "".join(['<div class="p-2 mx-auto">' + item + "</div>" for item in full_references])
+        + "</div>"
+    )
+    video_embed_array = ["https://www.youtube.com/embed/" + video for video in video_df["id"]]
+    full_embed_html = (
+        '<div class="d-flex flex-row flex-wrap">'
+        + "".join(
+            [
+                '<div class="py-3 mx-auto"><iframe'
+                + ' loading="lazy"'
+                + f' src="{item[0]}"'
+                + f' title="{item[1]}"'
+                + f' allow="{video_metrics.EMBED_ALLOW}"'
+                + " allowFullScreen></iframe></div>"
+                for item in zip(video_embed_array, video_title_array)
+            ]
+        )
+        + "</div>"
+    )
+
+    video_df["contentDetails.duration"] = video_df["contentDetails.duration"].astype(str)
+    video_df["duration"] = video_df["contentDetails.duration"].apply(
+        lambda x: isodate.parse_duration(x).total_seconds()
+    )
+
+    return full_references_html, full_embed_html
+
+
+def _preprocess_vectorized(video_df: pd.DataFrame) -> tuple[str, str]:
+    """Current implementation, see `video_metrics`."""
+    return video_metrics.video_html(video_metrics.preprocess_videos(video_df))
+
+
+def _scatter(video_df: pd.DataFrame):
+    """Scatter plot of the views vs. likes, like the app."""
+    return px.scatter(
+        video_df, x="statistics.viewCount", y="statistics.likeCount", hover_name="snippet.title"
+    )
+
+
+def _time(fcn, video_df: pd.DataFrame, repeat: int) -> float:
+    """Mean execution time of the function on copies of the table in milliseconds."""
+    copies = [video_df.copy() for _ in range(repeat)]
+    start = time.perf_counter()
+
+    for copy in copies:
+        fcn(copy)
+
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def check(video_df: pd.DataFrame) -> None:
+    """Check the durations against the previous implementation, and a selection without videos."""
+    rowwise, vectorized = video_df.copy(), video_df.copy()
+    _preprocess_rowwise(rowwise)
+    _preprocess_vectorized(vectorized)
+
+    if not np.array_equal(rowwise["duration"], vectorized["duration"]):
+        raise AssertionError("Durations differ from the previous implementation.")
+
+    # A selection without videos gives a table without columns, which must give empty plots.
+    empty = video_metrics.preprocess_videos(pd.json_normalize([]))
+    columns = ["duration", *video_metrics.VIDEO_COLUMNS, *video_metrics.COUNT_COLUMNS]
+
+    if len(empty) > 0 or any(column not in empty for column in columns):
+        raise AssertionError("Table of a selection without videos is incomplete.")
+
+    _scatter(empty)
+
+
+def run(n_videos: list[int], repeat: int) -> None:
+    """Run the benchmark for all numbers of videos and print the results."""
+    print(
+        f"{'videos':>8}{'rowwise [ms]':>14}{'vectorized [ms]':>17}"
+        f"{'plot str [ms]':>15}{'plot num [ms]':>15}"
+    )
+
+    for n in n_videos:
+        video_df = synthetic_videos(n)
+        check(video_df)
+        numeric_df = video_metrics.preprocess_videos(video_df.copy())
+
+        print(
+            f"{n:>8}"
+            f"{_time(_preprocess_rowwise, video_df, repeat):>14.3f}"
+            f"{_time(_preprocess_vectorized, video_df, repeat):>17.3f}"
+            f"{_time(_scatter, video_df, repeat):>15.2f}"
+            f"{_time(_scatter, numeric_df, repeat):>15.2f}"
+        )
+
+
+if __name__ == "__main__":
+    args_parser = argparse.ArgumentParser(description="YouTube video preprocessing benchmark.")
+
+    args_parser.add_argument(
+        "-n",
+        "--n-videos",
+        type=int,
+        nargs="+",
+        default=N_VIDEOS,
+        help="numbers of videos",
+    )
+
+    args_parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=20,
+        help="number of repetitions per measurement",
+    )
+
+    args = args_parser.parse_args()
+
+    run(args.n_videos, args.repeat)
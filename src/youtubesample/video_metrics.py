@@ -0,0 +1,114 @@
+"""Preprocessing of the trending videos for the plots and video lists.
+
+All preprocessing is done with vectorized column operations on the table of videos, such that it
+scales to more videos per selection (a higher maximum number of results, or multiple pages):
+
+- The ISO 8601 durations of the videos are parsed into seconds with a single regular expression.
+- The statistics, which the API returns as strings, are cast to numbers. Otherwise Plotly shows
+  them as categories instead of on a numeric axis.
+- The HTML of the video lists is assembled with string operations on whole columns.
+"""
+
+import numpy as np
+import pandas as pd
+
+# ISO 8601 duration as used by the YouTube API (e.g. PT1H2M3S, P1DT2H or P0D for live streams).
+DURATION_PATTERN = (
+    r"^P(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?"
+    r"(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$"
+)
+DURATION_UNITS = {"weeks": 604800, "days": 86400, "hours": 3600, "minutes": 60, "seconds": 1}
+
+# Statistics of the videos, counts returned as strings. Absent when disabled for all videos.
+COUNT_COLUMNS = [
+    "statistics.viewCount",
+    "statistics.likeCount",
+    "statistics.favoriteCount",
+    "statistics.commentCount",
+]
+
+# Other columns used by the app. A selection without videos has no columns at all.
+VIDEO_COLUMNS = ["id", "snippet.title", "contentDetails.duration"]
+
+VIDEO_URL = "https://www.youtube.com/watch?v="
+THUMBNAIL_URL = "https://img.youtube.com/vi/"
+EMBED_URL = "https://www.youtube.com/embed/"
+EMBED_ALLOW = (
+    "accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture"
+)
+
+
+def preprocess_videos(video_df: pd.DataFrame) -> pd.DataFrame:
+    """Add the duration in seconds and cast the statistics of the videos to numbers.
+
+    Args:
+        video_df:   Table with the normalized video resources, one row per video. Modified.
+
+    Returns:
+        video_df:   The table, with the "duration" column [s]. Durations that cannot be parsed and
+            statistics that are not available are NaN. Missing columns used by the app are added.
+    """
+    for column in VIDEO_COLUMNS:
+        if column not in video_df:
+            video_df[column] = float("nan")
+
+    video_df["duration"] = parse_durations(video_df["contentDetails.duration"])
+
+    for column in COUNT_COLUMNS:
+        if column in video_df:
+            video_df[column] = pd.to_numeric(video_df[column], errors="coerce")
+        else:
+            video_df[column] = float("nan")
+
+    return video_df
+
+
+def parse_durations(durations: pd.Series) -> np.ndarray:
+    """Parse ISO 8601 durations into seconds, NaN for durations that cannot be parsed."""
+    parts = durations.astype(object).str.extract(DURATION_PATTERN).to_numpy(dtype=float)
+    seconds = np.nan_to_num(parts) @ np.array(list(DURATION_UNITS.values()), dtype=float)
+
+    # The pattern also matches "P" and "PT", which are not valid durations.
+    seconds[np.isnan(parts).all(axis=1)] = np.nan
+
+    return seconds
+
+
+def video_html(video_df: pd.DataFrame) -> tuple[str, str]:
+    """HTML of the list of video thumbnails and of the list of embedded videos.
+
+    Args:
+        video_df:   Table with the videos to list, see `preprocess_videos`.
+
+    Returns:
+        references_html:    Thumbnails of the videos, linking to the videos on YouTube.
+        embed_html:         Embedded videos.
+    """
+    # Object arrays of strings, of which the elementwise concatenation is much faster than with
+    # the string columns of pandas.
+    ids = video_df["id"].to_numpy(dtype=str).astype(object)
+    titles = _escape(video_df["snippet.title"].to_numpy(dtype=str)).astype(object)
+
+    references = (
+        '<div class="p-2 mx-auto"><a href="' + VIDEO_URL + ids + '/" target="_blank">'
+        '<img src="' + THUMBNAIL_URL + ids + '/mqdefault.jpg" title="' + titles + '"></a></div>'
+    )
+    embeds = (
+        '<div class="py-3 mx-auto"><iframe loading="lazy" src="' + EMBED_URL + ids + '"'
+        ' title="' + titles + '" allow="' + EMBED_ALLOW + '" allowFullScreen></iframe></div>'
+    )
+
+    return _flex_row(references), _flex_row(embeds)
+
+
+def _escape(text: np.ndarray) -> np.ndarray:
+    """Escape text for use in HTML attribute values."""
+    for char, entity in (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;")):
+        text = np.char.replace(text, char, entity)
+
+    return text
+
+
+def _flex_row(items: np.ndarray) -> str:
+    """Wrap the HTML items in a wrapping flex row."""
+    return '<div class="d-flex flex-row flex-wrap">' + "".join(items) + "</div>"
@@ -0,0 +1,210 @@
+"""Cached data from the YouTube Data API.
+
+The region and category lists of the selection components change almost never. They are cached
+for all sessions of the process with a time-to-live, and fetched concurrently when not cached. The
+last fetched lists are also stored in a snapshot file, which is used when the API is not available.
+
+The trending videos are cached per region and category with a short time-to-live, such that
+switching back and forth between selections does not query the API (and use quota) again. API
+clients are reused, building a client loads the API discovery document.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+from googleapiclient.discovery import build
+
+YOUTUBE_API_URL = "https://www.googleapis.com/youtube/v3"
+TIMEOUT = 10
+
+# Time-to-live of the cached region and category lists [s], and the snapshot file of the lists.
+SELECTION_LISTS_TTL = 24 * 3600
+SELECTION_LISTS_FILE = os.path.join(tempfile.gettempdir(), "youtubesample_selection_lists.json")
+
+# Interval after which fetching is retried when the snapshot is used [s].
+SELECTION_LISTS_RETRY = 300
+
+# Region of which the video categories are listed.
+CATEGORY_REGION = "NL"
+
+# Time-to-live of the cached trending videos [s], and the maximum number of cached selections.
+TRENDING_TTL = 300
+TRENDING_CACHE_SIZE = 256
+
+# Number of trending videos to get.
+MAX_RESULTS = 25
+
+_selection_lists = {}
+_selection_lists_lock = threading.Lock()
+
+_trending_videos = {}
+_trending_videos_lock = threading.Lock()
+
+# API clients per thread, as the clients are not thread-safe.
+_clients = threading.local()
+
+
+def get_regions(developer_key: str) -> dict:
+    """Fetch the regions (countries) for which YouTube has trending videos.
+
+    Returns:
+        regions:    Dict with the labels (names) and values (region codes) of the regions.
+    """
+    items = _get_items("i18nRegions", {"part": "snippet", "hl": "en_US", "key": developer_key})
+
+    return {
+        "labels": [item["snippet"]["name"] for item in items],
+        "values": [item["snippet"]["gl"] for item in items],
+    }
+
+
+def get_categories(developer_key: str, region_code: str = CATEGORY_REGION) -> dict:
+    """Fetch the video categories of a region.
+
+    Returns:
+        categories: Dict with the labels (titles) and values (IDs) of the categories.
+    """
+    items = _get_items(
+        "videoCategories", {"part": "snippet", "regionCode": region_code, "key": developer_key}
+    )
+
+    return {
+        "labels": [item["snippet"]["title"] for item in items],
+        "values": [item["id"] for item in items],
+    }
+
+
+def get_selection_lists(developer_key: str) -> tuple[dict, dict]:
+    """Get the region and category lists, from the cache when not expired.
+
+    When not cached, the lists are fetched concurrently. When fetching fails, the lists of the
+    snapshot file are used.
+
+    Returns:
+        regions:    See `get_regions`.
+        categories: See `get_categories`.
+
+    Raises:
+        requests.RequestException: When fetching failed and there is no snapshot.
+    """
+    with _selection_lists_lock:
+        if time.time() - _selection_lists.get("time", -SELECTION_LISTS_TTL) < SELECTION_LISTS_TTL:
+            return _selection_lists["regions"], _selection_lists["categories"]
+
+        try:
+            with ThreadPoolExecutor(2) as executor:
+                regions = executor.submit(get_regions, developer_key)
+                categories = executor.submit(get_categories, developer_key)
+                lists = {"regions": regions.result(), "categories": categories.result()}
+
+            _write_snapshot(lists)
+        except (requests.RequestException, KeyError) as exc:
+            lists = _read_snapshot()
+
+            if lists is None:
+                raise
+
+            # The error message is not logged, as it contains the developer key in the url.
+            logging.warning(
+                "Fetching YouTube selection lists failed (%s), using snapshot.", type(exc).__name__
+            )
+            _selection_lists.update(
+                lists, time=time.time() - SELECTION_LISTS_TTL + SELECTION_LISTS_RETRY
+            )
+        else:
+            _selection_lists.update(lists, time=time.time())
+
+        return lists["regions"], lists["categories"]
+
+
+def _get_items(resource: str, params: dict) -> list:
+    """Get the items of a YouTube Data API resource."""
+    response = requests.get(f"{YOUTUBE_API_URL}/{resource}", params=params, timeout=TIMEOUT)
+    response.raise_for_status()
+
+    return response.json()["items"]
+
+
+def _write_snapshot(lists: dict) -> None:
+    """Store the selection lists in the snapshot file."""
+    try:
+        with open(SELECTION_LISTS_FILE, "w") as f:
+            json.dump(lists, f)
+    except OSError as exc:
+        logging.warning("Writing YouTube selection lists snapshot failed: %s", exc)
+
+
+def _read_snapshot() -> dict | None:
+    """Read the selection lists from the snapshot file, or None when there is none."""
+    try:
+        with open(SELECTION_LISTS_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def get_client(developer_key: str):
+    """Get the YouTube API client for the developer key, reused by all sessions of the thread."""
+    if not hasattr(_clients, "pool"):
+        _clients.pool = {}
+
+    if developer_key not in _clients.pool:
+        _clients.pool[developer_key] = build("youtube", "v3", developerKey=developer_key)
+
+    return _clients.pool[developer_key]
+
+
+def get_trending_videos(developer_key: str, region_code: str, category_id) -> pd.DataFrame:
+    """Get the trending videos of a category in a region, from the cache when not expired.
+
+    Args:
+        developer_key:  YouTube developer key.
+        region_code:    Region (country) code.
+        category_id:    Video category ID.
+
+    Returns:
+        video_df:       Table with the normalized video resources, one row per video. A copy of
+            the cached table, which may be modified.
+    """
+    key = (region_code, str(category_id))
+
+    with _trending_videos_lock:
+        cached = _trending_videos.get(key)
+
+    if cached is not None and time.time() - cached[0] < TRENDING_TTL:
+        return cached[1].copy()
+
+    # Extract YouTube data, using API key.
+    video_request = get_client(developer_key).videos().list(
+        part="snippet,statistics,contentDetails",
+        chart="mostPopular",
+        regionCode=region_code,
+        videoCategoryId=str(category_id),
+        maxResults=MAX_RESULTS,
+    )
+
+    response = video_request.execute()
+    video_df = pd.json_normalize(response["items"])
+
+    with _trending_videos_lock:
+        # Store the selection as the newest one.
+        _trending_videos.pop(key, None)
+        _trending_videos[key] = (time.time(), video_df)
+
+        # Remove the expired selections, and the oldest ones when the cache is full.
+        now = time.time()
+        expired = [k for k, (stored, _) in _trending_videos.items() if now - stored >= TRENDING_TTL]
+        for k in expired:
+            del _trending_videos[k]
+
+        while len(_trending_videos) > TRENDING_CACHE_SIZE:
+            del _trending_videos[next(iter(_trending_videos))]
+
+    return video_df.copy()
@@ -1,14 +1,12 @@
 import json
 import os
 
-import isodate
 import pandas as pd
 import plotly.express as px
-import requests
-from googleapiclient.discovery import build
 from plotly.subplots import make_subplots
 
 from simian.gui import Form, component, utils
+from youtubesample import video_metrics, youtube_data
 
 if __name__ == "__main__":
     from simian.local import Uiformio
@@ -20,18 +18,15 @@ def gui_init(meta_data: dict) -> dict:
     # Get application data containing secrets and configurables (local mode).
     get_application_data(meta_data)
 
+    # Get the country and category lists, cached for all sessions.
+    regions, categories = youtube_data.get_selection_lists(
+        meta_data["application_data"]["youtube_developer_key"]
+    )
+
     # Create the form and load the json builder into it.
     # Form.componentInitializer(app_pic_hello_world=init_app_toplevel_pic)
-    Form.componentInitializer(
-        selection_country=get_init_selection_country(
-            meta_data["application_data"]["youtube_developer_key"]
-        )
-    )
-    Form.componentInitializer(
-        selection_category=get_init_selection_category(
-            meta_data["application_data"]["youtube_developer_key"]
-        )
-    )
+    Form.componentInitializer(selection_country=get_init_selection_country(regions))
+    Form.componentInitializer(selection_category=get_init_selection_category(categories))
     Form.componentInitializer(video_list=init_video_list)
     Form.componentInitializer(iframe=init_video_iframe)
     Form.componentInitializer(showVideo=init_show_video)
@@ -71,32 +66,22 @@ def init_show_video(comp: component.Toggle):
     comp.defaultValue = False
 
 
-def get_init_selection_country(youtube_developer_key: str):
+def get_init_selection_country(regions: dict):
     def init_selection_country(comp: component.Select):
         # Add trigger-happy event handler to this component.
-        # Populate component with list of ISO 3166 Country Codes, using the pycountry module.
+        # Populate component with list of ISO 3166 Country Codes, fetched from YouTube API.
         comp.properties = {"debounceTime": 700, "triggerHappy": "process"}
-        url = f"https://www.googleapis.com/youtube/v3/i18nRegions?part=snippet&hl=en_US&key={youtube_developer_key}"
-        response = requests.get(url)
-        datajson = response.json()
-        labels = [item["snippet"]["name"] for item in datajson["items"]]
-        values = [item["snippet"]["gl"] for item in datajson["items"]]
-        comp.setValues(labels, values, "NL")
+        comp.setValues(regions["labels"], regions["values"], "NL")
 
     return init_selection_country
 
 
-def get_init_selection_category(youtube_developer_key: str):
+def get_init_selection_category(categories: dict):
     def init_selection_category(comp: component.Select):
         # Add trigger-happy event handler to this component.
         # Populate component with list of categories, fetched from YouTube API.
         comp.properties = {"debounceTime": 700, "triggerHappy": "process"}
-        url = f"https://www.googleapis.com/youtube/v3/videoCategories?part=snippet&regionCode=NL&key={youtube_developer_key}"
-        response = requests.get(url)
-        datajson = response.json()
-        labels = [item["snippet"]["title"] for item in datajson["items"]]
-        values = [item["id"] for item in datajson["items"]]
-        comp.setValues(labels, values, "28")
+        comp.setValues(categories["labels"], categories["values"], "28")
 
     return init_selection_category
 
@@ -150,67 +135,28 @@ def process(meta_data: dict, payload: dict) -> dict:
     plot_obj_comments_vs_likes, _ = utils.getSubmissionData(payload, "plot_comments_vs_likes")
     plot_obj_duration_vs_comments, _ = utils.getSubmissionData(payload, "plot_duration_vs_comments")
 
-    # Initialize YouTube connection and create results plots.
-    youtube = build(
-        "youtube", "v3", developerKey=meta_data["application_data"]["youtube_developer_key"]
-    )
-
+    # Get the trending videos from the YouTube API (or the cache) and create results plots.
     try:
-        video_df = extractYouTubeData(youtube, selection_country, selection_category)
+        video_df = youtube_data.get_trending_videos(
+            meta_data["application_data"]["youtube_developer_key"],
+            selection_country,
+            selection_category,
+        )
     except:
         video_df = get_empty_video_df()
 
+    # Parse the durations and cast the statistics to numbers, and create the video lists.
+    video_df = video_metrics.preprocess_videos(video_df)
+
     if len(video_df) > 0:
-        video_df_top = video_df.iloc[:nr_to_display]
-        video_title_array = [video for video in video_df_top["snippet.title"]]
-        video_link_array = [
-            "https://www.youtube.com/watch?v=" + video for video in video_df_top["id"]
-        ]
-        video_thumbnail_array = [
-            "https://img.youtube.com/vi/" + video + "/mqdefault.jpg" for video in video_df_top["id"]
-        ]
-        video_embed_array = [
-            "https://www.youtube.com/embed/" + video for video in video_df_top["id"]
-        ]
-        full_references = [
-            f'<a href="{x[0]}/" target="_blank"><img src="{x[2]}" title="{x[1]}"></a>'
-            for x in zip(video_link_array, video_title_array, video_thumbnail_array)
-        ]
-        full_references_html = (
-            '<div class="d-flex flex-row flex-wrap">'
-            + "".join(['<div class="p-2 mx-auto">' + item + "</div>" for item in full_references])
-            + "</div>"
-        )
-        video_embed_array = [
-            "https://www.youtube.com/embed/" + video for video in video_df_top["id"]
-        ]
-        full_embed_html = (
-            '<div class="d-flex flex-row flex-wrap">'
-            + "".join(
-                [
-                    '<div class="py-3 mx-auto"><iframe'
-                    + ' loading="lazy"'
-                    + f' src="{item[0]}"'
-                    + f' title="{item[1]}"'
-                    + ' loading="lazy"'
-                    + ' allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture"'
-                    + " allowFullScreen></iframe></div>"
-                    for item in zip(video_embed_array, video_title_array)
-                ]
-            )
-            + "</div>"
+        full_references_html, full_embed_html = video_metrics.video_html(
+            video_df.iloc[:nr_to_display]
         )
-
     else:
         no_results_html = '<p class="my-5 py-5 text-danger text-center">No results for this category in this country.</p>'
         full_references_html = no_results_html
         full_embed_html = no_results_html
 
-    video_df["contentDetails.duration"] = video_df["contentDetails.duration"].astype(str)
-    video_df["duration"] = video_df["contentDetails.duration"].apply(
-        lambda x: isodate.parse_duration(x).total_seconds()
-    )
-
     payload, _ = utils.setSubmissionData(
         payload,
         "plot_views_vs_likes",
@@ -277,22 +223,6 @@ def process(meta_data: dict, payload: dict) -> dict:
     return payload
 
 
-def extractYouTubeData(youtube, selection_country, selection_category):
-    # Extract YouTube data, using API key.
-    video_request = youtube.videos().list(
-        part="snippet,statistics,contentDetails",
-        chart="mostPopular",
-        regionCode=selection_country,
-        videoCategoryId=str(selection_category),
-        maxResults=25,
-    )
-
-    response = video_request.execute()
-    video_df = pd.json_normalize(response["items"])
-
-    return video_df
-
-
 def plotVs(plotObj, video_df, x_field, y_field, title, x_label, y_label):
     # Hide selection tools and plotly logo
     plotObj.config = dict(modeBarButtonsToRemove=["select", "lasso", "logo"])
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The apps are run with the src folder on the Python path.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
@@ -0,0 +1,185 @@
+"""Round-trip tests of the compact array encoding in the submission data of the apps."""
+
+import datetime
+import json
+import math
+
+import numpy as np
+import pytest
+from simian.gui.testing import Testing
+
+from array_encoding import decode_array, encode_array, is_encoded
+
+# Minimum size reduction of the JSON payload of float64 values encoded as float32.
+MIN_SIZE_REDUCTION = 3
+
+
+def json_round_trip(data):
+    """Serialize the data to JSON and back, like the submission data in the payload."""
+    return json.loads(json.dumps(data))
+
+
+def submission_data(payload: dict) -> dict:
+    """Submission data of the payload after an event, as received by the browser."""
+    return json_round_trip(payload["submission"]["data"])
+
+
+def assert_decodes_to(encoded, values) -> None:
+    """Assert that the encoded array decodes to the float32 values."""
+    values = np.asarray(values)
+    decoded = decode_array(encoded)
+
+    assert is_encoded(encoded)
+    assert decoded.dtype == np.float32
+    assert decoded.shape == values.shape
+    np.testing.assert_array_equal(decoded, values.astype(np.float32))
+    np.testing.assert_allclose(decoded, values, rtol=1e-6, atol=1e-6)
+
+
+def assert_smaller(encoded: list, values: list) -> None:
+    """Assert the size reduction of the encoded arrays, compared to JSON lists of the values."""
+    plain_size = len(json.dumps([np.asarray(v).tolist() for v in values]))
+    assert plain_size >= MIN_SIZE_REDUCTION * len(json.dumps(encoded))
+
+
+class TestHypoplannerFigures(Testing):
+    namespace = "hypoplanner.hypo_planner"
+
+    def test_line_figures_round_trip(self):
+        from hypoplanner import hypo_planner
+
+        self.updateSubmissionData("toggle_simulatie", True)
+        self.press("calculate_button")
+        data = submission_data(self.payload)
+
+        inputs = {key: self.getSubmissionData(key)[0] for key in hypo_planner.INPUT_KEYS}
+        inputs.update(hold_netto_maandlast=(), today=datetime.date.today())
+        hypotheek = hypo_planner.calc_hypotheek(inputs)
+        verloop = hypo_planner.calc_verloop(inputs, hypotheek)
+        fiscaal = hypo_planner.calc_fiscaal(inputs, verloop)
+        table = hypo_planner.calc_tabel(inputs, verloop, fiscaal)
+
+        encoded, values = [], []
+
+        for key in ["plot_verloop_lasten", "plot_verloop_hypotheek"]:
+            columns, _ = hypo_planner.LINE_FIGURES[key]
+            traces = data[key]["data"][: len(columns)]
+
+            for name, trace in zip(columns, traces, strict=True):
+                assert trace["name"] == name
+                assert_decodes_to(trace["y"], table[name])
+                encoded.append(trace["y"])
+                values.append(table[name])
+
+        # The simulation traces follow the line traces: the bands and the median.
+        simulatie = hypo_planner.calc_simulatie(inputs)
+        netto = dict(zip(simulatie["percentiles"], simulatie["netto"]))
+        percentiles = [p for band in hypo_planner.SIMULATIE_BANDEN for p in band[:2]] + [50]
+        columns, _ = hypo_planner.LINE_FIGURES["plot_verloop_lasten"]
+        traces = data["plot_verloop_lasten"]["data"][len(columns) :]
+
+        for percentile, trace in zip(percentiles, traces, strict=True):
+            assert_decodes_to(trace["y"], netto[percentile])
+            encoded.append(trace["y"])
+            values.append(netto[percentile])
+
+        # Over all figures, as constant lines (like the WOZ value) are short in JSON too.
+        assert_smaller(encoded, values)
+
+
+class TestBallthrowerFigure(Testing):
+    namespace = "simian.examples.ballthrower"
+
+    def test_trajectory_round_trip(self):
+        from simian.examples import ballthrower
+        from simian.examples.ballthrower_engine import BallThrower
+
+        self.press("throwButton")
+
+        # Drag and wind are disabled by default, which zeroes their settings.
+        speed, _ = self.getSubmissionData("throwSpeed")
+        angle = math.radians(self.getSubmissionData("throwAngle")[0])
+        _t, x, y, _u, _v = BallThrower.throw_ball(
+            u0=speed * math.cos(angle),
+            v0=speed * math.sin(angle),
+            Cd=0,
+            r=0,
+            rho=0,
+            g=-self.getSubmissionData("gravity")[0],
+            m=self.getSubmissionData("ballMass")[0],
+            w=0,
+            n_points=ballthrower.TRAJECTORY_POINTS,
+        )
+
+        (trace,) = submission_data(self.payload)["plot"]["data"]
+        assert_decodes_to(trace["x"], x)
+        assert_decodes_to(trace["y"], y)
+        assert_smaller([trace["x"], trace["y"]], [x, y])
+
+
+def test_is_encoded_rejects_plain_lists():
+    assert not is_encoded([1.0, 2.0, 3.0])
+    assert not is_encoded([[1.0, 2.0], [3.0, 4.0]])
+    assert not is_encoded({"dtype": "f4"})
+    assert is_encoded(json_round_trip(encode_array([1.0, 2.0, 3.0])))
+
+    # Plain lists, as stored by older versions, are decoded as they are.
+    np.testing.assert_array_equal(decode_array([[1.0, 2.0], [3.0, 4.0]]), [[1, 2], [3, 4]])
+
+
+def test_multi_dimensional_round_trip():
+    values = np.random.default_rng(0).random((3, 4, 5))
+    decoded = decode_array(json_round_trip(encode_array(values)))
+
+    assert decoded.dtype == np.float32
+    assert decoded.shape == values.shape
+    np.testing.assert_allclose(decoded, values, rtol=1e-6)
+
+
+try:
+    from birdswarm import bird_swarm
+except ImportError:
+    # The bird swarm app needs matplotlib, scipy, noise and its compiled Cython modules.
+    bird_swarm = None
+
+
+@pytest.mark.skipif(bird_swarm is None, reason="bird swarm app dependencies not available")
+class TestBirdSwarmElevationMap(Testing):
+    namespace = "birdswarm.bird_swarm"
+
+    def test_elevation_map_round_trip(self):
+        from birdswarm import heightmap
+
+        self.press("initialize_landscape_button")
+
+        # Send the encoded map through JSON, and decode it as the calculate event does.
+        encoded, _ = self.getSubmissionData("terrain_elevation_map")
+        self.updateSubmissionData("terrain_elevation_map", json_round_trip(encoded))
+        elevation_map = bird_swarm.get_elevation_map({**self.payload, "formMap": self.form_map})
+
+        map_size, _ = self.getSubmissionData("map_size")
+        X = np.arange(0, map_size)
+        Y = np.arange(0, map_size)
+        xg, yg = np.meshgrid(X, Y)
+        zg = np.array(
+            heightmap.generate_heightmap(
+                [map_size, map_size],
+                self.getSubmissionData("seed")[0],
+                self.getSubmissionData("scale")[0],
+                self.getSubmissionData("expo")[0],
+                self.getSubmissionData("octaves")[0],
+            )
+        )
+
+        np.testing.assert_array_equal(elevation_map["X"], X)
+        np.testing.assert_array_equal(elevation_map["Y"], Y)
+        np.testing.assert_array_equal(elevation_map["xg"], xg)
+        np.testing.assert_array_equal(elevation_map["yg"], yg)
+
+        assert elevation_map["zg"].dtype == np.float32
+        assert elevation_map["zg"].shape == (map_size, map_size)
+        np.testing.assert_allclose(elevation_map["zg"], zg, rtol=1e-6, atol=1e-6)
+
+        encoded, _ = self.getSubmissionData("terrain_elevation_map")
+        plain = {"X": X.tolist(), "Y": Y.tolist(), "zg": zg.tolist()}
+        assert len(json.dumps(plain)) >= MIN_SIZE_REDUCTION * len(json.dumps(encoded))
@@ -0,0 +1,112 @@
+"""Tests of the here.com lookup client against a local stub server."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from routeplanner import here_lookup
+
+INTERVAL = 0.05
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Lookup endpoint that responds with the queued statuses of a location, then with 200."""
+
+    def do_GET(self):
+        location_id = parse_qs(urlparse(self.path).query)["id"][0]
+
+        with self.server.lock:
+            self.server.requests.append((location_id, time.monotonic()))
+            statuses = self.server.statuses.get(location_id, [])
+            status = statuses.pop(0) if statuses else 200
+
+        body = json.dumps({"id": location_id, "position": {"lat": 52.0, "lng": 4.0}}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Stub server, with the statuses to respond with by location and the received requests."""
+    monkeypatch.setattr(here_lookup, "BACKOFF_FACTOR", 0)
+
+    stub = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    stub.lock = threading.Lock()
+    stub.statuses = {}
+    stub.requests = []
+    stub.url = f"http://127.0.0.1:{stub.server_address[1]}/lookup"
+
+    thread = threading.Thread(target=stub.serve_forever, daemon=True)
+    thread.start()
+    yield stub
+    stub.shutdown()
+    stub.server_close()
+
+
+def requested_ids(server) -> list[str]:
+    return [location_id for location_id, _ in server.requests]
+
+
+def test_lookup_all(server):
+    client = here_lookup.HereLookupClient("key", base_url=server.url)
+    locations = client.lookup_all(["a", "b", "a", "c"])
+
+    assert [location["id"] for location in locations] == ["a", "b", "a", "c"]
+    assert sorted(requested_ids(server)) == ["a", "b", "c"]
+
+
+def test_not_found_is_not_retried(server):
+    server.statuses["a"] = [404]
+    client = here_lookup.HereLookupClient("key", base_url=server.url)
+
+    with pytest.raises(here_lookup.HereLookupError) as exc_info:
+        client.lookup("a")
+
+    assert exc_info.value.status_code == 404
+    assert requested_ids(server) == ["a"]
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_failed_lookup_is_retried(server, status):
+    server.statuses["a"] = [status, status]
+    client = here_lookup.HereLookupClient("key", base_url=server.url)
+
+    assert client.lookup("a")["id"] == "a"
+    assert requested_ids(server) == ["a"] * 3
+
+
+def test_retries_are_limited(server):
+    server.statuses["a"] = [503] * (here_lookup.MAX_RETRIES + 1)
+    client = here_lookup.HereLookupClient("key", base_url=server.url)
+
+    with pytest.raises(here_lookup.HereLookupError) as exc_info:
+        client.lookup("a")
+
+    assert exc_info.value.status_code == 503
+    assert requested_ids(server) == ["a"] * (here_lookup.MAX_RETRIES + 1)
+
+
+def test_retries_respect_rate_limit(server):
+    server.statuses.update(a=[429], b=[500, 502], c=[503])
+    client = here_lookup.HereLookupClient("key", INTERVAL, base_url=server.url)
+    locations = client.lookup_all(["a", "b", "c", "d"])
+
+    assert [location["id"] for location in locations] == ["a", "b", "c", "d"]
+    assert len(server.requests) == 8
+
+    # All requests, including the retries, are spaced by the lookup interval.
+    times = sorted(request_time for _, request_time in server.requests)
+    gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+    assert min(gaps) >= 0.8 * INTERVAL